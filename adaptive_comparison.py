@@ -0,0 +1,168 @@
+"""
+Adaptive Agent Comparison
+
+This module compares agents by sequential sampling instead of a fixed number of
+episodes. Every cell (an agent in one environment configuration) starts with a few
+episodes; cells whose 95% confidence intervals on mean energy and success rate are
+still wider than the target get more episodes, round by round, until they are tight
+enough or the per-cell budget runs out. Easy cells stop early, hard cells get the
+episodes they need, and the report says how many each one used.
+"""
+
+import math
+
+import pandas as pd
+
+from experiment_runner import iter_experiments
+
+Z_95 = 1.959964  # Two-sided 95% normal quantile
+
+
+def mean_interval(values):
+    """
+    Sample mean with a normal-approximation 95% confidence interval.
+
+    Returns:
+        tuple: (mean, low, high)
+    """
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, -math.inf, math.inf
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    half_width = Z_95 * math.sqrt(variance / n)
+    return mean, mean - half_width, mean + half_width
+
+
+def wilson_interval(successes, n):
+    """
+    Success rate with a Wilson score 95% confidence interval.
+
+    Unlike the normal approximation, the interval stays informative when every
+    (or no) episode succeeds.
+
+    Returns:
+        tuple: (rate, low, high)
+    """
+    rate = successes / n
+    z2 = Z_95 * Z_95
+    center = (rate + z2 / (2 * n)) / (1 + z2 / n)
+    half_width = Z_95 * math.sqrt(rate * (1 - rate) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return rate, max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def cell_statistics(rows):
+    """
+    Summarize the episodes of one cell.
+
+    Returns:
+        dict: runs, energy mean/interval, success rate/interval and mean uncleaned
+              squares (NaN for the perfect-sensor environment)
+    """
+    energy, energy_low, energy_high = mean_interval([row['energy'] for row in rows])
+    success, success_low, success_high = wilson_interval(sum(row['success'] for row in rows), len(rows))
+    return {'runs': len(rows),
+            'energy': energy, 'energy_low': energy_low, 'energy_high': energy_high,
+            'success_rate': success, 'success_low': success_low, 'success_high': success_high,
+            'uncleaned': sum(row['uncleaned'] for row in rows) / len(rows)}
+
+
+def is_converged(stats, energy_tolerance, success_tolerance):
+    """
+    Check whether a cell's intervals are tight enough to stop sampling.
+
+    The energy interval half-width must be within energy_tolerance of the mean,
+    and the success interval half-width within success_tolerance (absolute).
+    """
+    energy_half = (stats['energy_high'] - stats['energy_low']) / 2
+    success_half = (stats['success_high'] - stats['success_low']) / 2
+    return energy_half <= energy_tolerance * stats['energy'] and success_half <= success_tolerance
+
+
+def run_adaptive(cells, min_runs=20, max_runs=200, round_runs=20, energy_tolerance=0.05,
+                 success_tolerance=0.05, base_seed=0, max_workers=None, cache=None):
+    """
+    Sample every cell until its confidence intervals are tight enough.
+
+    Run i of every cell uses seed base_seed + i, so cells are compared on the
+    same rooms and results are reproducible. All cells start with min_runs
+    episodes. Then, round by round, cells whose intervals are still too wide get
+    round_runs more seeds, up to max_runs. Each round's episodes of all cells run
+    together on the process pool.
+
+    Args:
+        cells: List of (labels, job) pairs. labels is a dict of summary columns
+               naming the cell; job is a job dict without a seed (see experiment_runner)
+        min_runs: Episodes every cell runs before convergence is checked
+        max_runs: Episode budget per cell
+        round_runs: Episodes added to an unconverged cell per round
+        energy_tolerance: Target energy half-width, relative to the mean
+        success_tolerance: Target success rate half-width (absolute)
+        base_seed: Seed of the first run
+        max_workers: Number of worker processes (default: all cores)
+        cache: Optional result_cache.ResultCache; cached episodes are not simulated again
+
+    Returns:
+        DataFrame: One row per cell: its labels, runs, means, intervals and
+                   whether it converged within the budget
+    """
+    rows = [[] for _ in cells]
+    pending = list(range(len(cells)))
+    batch = min_runs
+    while pending:
+        jobs = []
+        for cell in pending:
+            start = base_seed + len(rows[cell])
+            stop = min(start + batch, base_seed + max_runs)
+            jobs += [dict(cells[cell][1], cell=cell, seed=seed) for seed in range(start, stop)]
+        for row in iter_experiments(jobs, max_workers=max_workers, cache=cache):
+            rows[row['cell']].append(row)
+
+        pending = [cell for cell in pending
+                   if len(rows[cell]) < max_runs
+                   and not is_converged(cell_statistics(rows[cell]), energy_tolerance, success_tolerance)]
+        batch = round_runs
+
+    summary = []
+    for (labels, _), cell_rows in zip(cells, rows):
+        stats = cell_statistics(cell_rows)
+        summary.append(dict(labels, **stats,
+                            converged=is_converged(stats, energy_tolerance, success_tolerance)))
+    return pd.DataFrame(summary)
+
+
+def compare_agents(agent_names, room_size=5, dirt_prob=0.2, error_rate=0.0, max_steps=1000,
+                   **options):
+    """
+    Compare agents in one environment configuration with adaptive sampling.
+
+    Args:
+        agent_names: Agents to compare (keys of experiment_runner.AGENTS)
+        room_size: Size of the square room
+        dirt_prob: Probability that each square starts dirty
+        error_rate: Dirt sensor error rate (0 uses the perfect-sensor environment)
+        max_steps: Maximum number of steps per episode
+        **options: Passed on to run_adaptive() (min_runs, max_runs, tolerances, ...)
+
+    Returns:
+        DataFrame: One row per agent (see run_adaptive())
+    """
+    job = {'room_size': room_size, 'dirt_prob': dirt_prob, 'error_rate': error_rate,
+           'max_steps': max_steps}
+    return run_adaptive([({'agent': agent_name}, dict(job, agent=agent_name)) for agent_name in agent_names],
+                        **options)
+
+
+def print_comparison(summary):
+    """Print runs, mean energy and success rate with 95% intervals for each agent."""
+    print(f"{'Agent':<22}{'Runs':>6}{'Energy (95% CI)':>26}{'Success (95% CI)':>24}")
+    for row in summary.itertuples():
+        energy = f"{row.energy:7.1f} [{row.energy_low:7.1f}, {row.energy_high:7.1f}]"
+        success = (f"{row.success_rate * 100:5.1f}% [{row.success_low * 100:5.1f}, "
+                   f"{row.success_high * 100:5.1f}]")
+        budget = "" if row.converged else "  (budget reached)"
+        print(f"{row.agent:<22}{row.runs:>6}{energy:>26}{success:>24}{budget}")
+
+
+if __name__ == "__main__":
+    print_comparison(compare_agents(['Randomized', 'Simple Reflex', 'Model-Based', 'Improved Model-Based']))
@@ -6,232 +6,83 @@ and develops improved solutions for handling sensor uncertainty.
 """
 
 import numpy as np
-import random
-from environment import vacuum_environment
-from simple_agent import simple_randomized_agent, simple_reflex_agent
-from model_based_agent import model_based_reflex_agent, reset_agent_state
+from environment import run_episode, print_step, ObserverChain, Room
+from frontier import FrontierIndex
+from rooms import resolve_room_map
+from sensor_noise import SensorNoise
+from seeding import episode_streams
+from percepts import SUCK
+from model_based_agent import ModelBasedReflexAgent
 
 def imperfect_dirt_environment(agent_function, room_size=5, dirt_prob=0.2, max_steps=1000, 
-                             sensor_error_rate=0.1, verbose=False):
+                             sensor_error_rate=0.1, verbose=False, room_map=None, bumper_miss_rate=0.0,
+                             sensor_noise=None, observer=None, seed=None, profiler=None):
     """
     Environment with imperfect dirt sensor that gives wrong readings 10% of the time.
     
+    The bumpers can be made unreliable too: each wall next to the agent goes
+    undetected with probability bumper_miss_rate. Walls still stop the agent; only
+    the percept is affected. The noise comes from a sensor_noise.SensorNoise stage
+    that draws it in blocks. The episode itself runs on environment.run_episode.
+    
     Args:
-        agent_function: The agent program function
+        agent_function: The agent program function, or an Agent (reset before the episode starts)
         room_size: Size of the square room
         dirt_prob: Probability that each square starts dirty
         max_steps: Maximum number of steps before timeout
         sensor_error_rate: Probability of sensor giving wrong reading
         verbose: Whether to print debug information
+        room_map: Optional floor plan (RoomMap or layout file path); overrides room_size
+        bumper_miss_rate: Probability that each bumper misses an adjacent wall
+        sensor_noise: Optional SensorNoise stage to use instead of one built from
+                      sensor_error_rate and bumper_miss_rate
+        observer: Optional per-step observer (see environment.run_episode)
+        seed: Optional int, SeedSequence or Generator giving the room, start, sensor
+              noise and agent independent streams (see seeding.episode_streams;
+              only Agent objects receive the agent stream)
+        profiler: Optional profiling.PhaseProfiler timing the episode's phases
     
     Returns:
         tuple: (total_energy_used, success_flag, steps_taken, uncleaned_squares)
     """
     
+    streams = episode_streams(seed) if seed is not None else None
+    
     # Initialize room state
-    room = np.random.random((room_size, room_size)) < dirt_prob
-    initial_dirty_count = np.sum(room)
+    room_map = resolve_room_map(room_map, room_size)
+    room = Room.random(room_size, dirt_prob, room_map, streams and streams.room)
     
     # Random starting position
-    agent_x = random.randint(0, room_size - 1)
-    agent_y = random.randint(0, room_size - 1)
+    agent_x, agent_y = room_map.random_start(streams and streams.start)
+    
+    if sensor_noise is None:
+        sensor_noise = SensorNoise(sensor_error_rate, bumper_miss_rate)
     
     if verbose:
         print(f"Initial room state (1=dirty, 0=clean):")
-        print(room.astype(int))
+        print(room.grid.astype(int))
         print(f"Agent starts at position ({agent_x}, {agent_y})")
-        print(f"Initial dirty squares: {initial_dirty_count}")
+        print(f"Initial dirty squares: {room.remaining_dirt}")
         print()
+        observer = print_step if observer is None else ObserverChain(print_step, observer)
     
-    energy_used = 0
-    steps_taken = 0
-    
-    # Main simulation loop
-    while energy_used < max_steps:
-        # Check if room is completely clean
-        if np.sum(room) == 0:
-            if verbose:
-                print(f"Room cleaned! Total energy used: {energy_used}")
-            return energy_used, True, steps_taken, 0
-        
-        # Create bumper sensors
-        bumpers = {
-            "north": agent_y == 0,
-            "south": agent_y == room_size - 1,
-            "west": agent_x == 0,
-            "east": agent_x == room_size - 1
-        }
-        
-        # Imperfect dirt sensor
-        actual_dirty = room[agent_y, agent_x]
-        if np.random.random() < sensor_error_rate:
-            dirty = not actual_dirty  # Wrong reading
-        else:
-            dirty = actual_dirty  # Correct reading
-        
-        if verbose:
-            print(f"Step {steps_taken}: Agent at ({agent_x}, {agent_y})")
-            print(f"Actual dirty: {actual_dirty}, Sensor reading: {dirty}")
-            print(f"Bumpers: {bumpers}")
-        
-        # Get action from agent
-        action = agent_function(bumpers, dirty)
-        
-        if verbose:
-            print(f"Action: {action}")
-        
-        # Execute action
-        if action == "suck":
-            if actual_dirty:
-                room[agent_y, agent_x] = False
-                if verbose:
-                    print("Square cleaned!")
-            else:
-                if verbose:
-                    print("Sucking on clean square (no effect)")
-        
-        elif action == "north":
-            if agent_y > 0:
-                agent_y -= 1
-                if verbose:
-                    print(f"Moved north to ({agent_x}, {agent_y})")
-            else:
-                if verbose:
-                    print("Bumped into north wall")
-        
-        elif action == "south":
-            if agent_y < room_size - 1:
-                agent_y += 1
-                if verbose:
-                    print(f"Moved south to ({agent_x}, {agent_y})")
-            else:
-                if verbose:
-                    print("Bumped into south wall")
-        
-        elif action == "west":
-            if agent_x > 0:
-                agent_x -= 1
-                if verbose:
-                    print(f"Moved west to ({agent_x}, {agent_y})")
-            else:
-                if verbose:
-                    print("Bumped into west wall")
-        
-        elif action == "east":
-            if agent_x < room_size - 1:
-                agent_x += 1
-                if verbose:
-                    print(f"Moved east to ({agent_x}, {agent_y})")
-            else:
-                if verbose:
-                    print("Bumped into east wall")
-        
-        energy_used += 1
-        steps_taken += 1
-        
-        if verbose:
-            print(f"Remaining dirty squares: {np.sum(room)}")
-            print()
+    energy_used, success, steps_taken = run_episode(agent_function, room, room_map, agent_x, agent_y,
+                                                    max_steps, sensor_noise, observer,
+                                                    streams and streams.agent, streams and streams.noise,
+                                                    profiler)
+    uncleaned_squares = room.remaining_dirt
     
-    # Timeout reached
-    uncleaned_squares = np.sum(room)
     if verbose:
-        print(f"Timeout reached after {max_steps} steps.")
-        print(f"Remaining dirty squares: {uncleaned_squares}")
+        if success:
+            print(f"Room cleaned! Total energy used: {energy_used}")
+        else:
+            print(f"Timeout reached after {max_steps} steps.")
+            print(f"Remaining dirty squares: {uncleaned_squares}")
     
-    return energy_used, False, steps_taken, uncleaned_squares
+    return energy_used, success, steps_taken, uncleaned_squares
 
 # Improved model-based agent for imperfect sensors
-agent_state = {
-    'position': None,
-    'room_size': 5,
-    'visited': set(),
-    'cleaned': set(),
-    'mode': 'LOCATE',
-    'exploration_path': [],
-    'path_index': 0,
-    'last_action': None,
-    'confidence': {}
-}
-
-def reset_improved_agent_state():
-    """Reset the improved agent state for a new run."""
-    global agent_state
-    agent_state = {
-        'position': None,
-        'room_size': 5,
-        'visited': set(),
-        'cleaned': set(),
-        'mode': 'LOCATE',
-        'exploration_path': [],
-        'path_index': 0,
-        'last_action': None,
-        'confidence': {}
-    }
-
-def infer_position_from_bumpers(bumpers):
-    """Infer current position based on bumper sensors."""
-    wall_count = sum(bumpers.values())
-    
-    if wall_count == 2:
-        if bumpers['north'] and bumpers['west']:
-            return (0, 0)
-        elif bumpers['north'] and bumpers['east']:
-            return (4, 0)
-        elif bumpers['south'] and bumpers['west']:
-            return (0, 4)
-        elif bumpers['south'] and bumpers['east']:
-            return (4, 4)
-    elif wall_count == 1:
-        if bumpers['north']:
-            return (2, 0)
-        elif bumpers['south']:
-            return (2, 4)
-        elif bumpers['west']:
-            return (0, 2)
-        elif bumpers['east']:
-            return (4, 2)
-    
-    return (2, 2)
-
-def get_available_directions(bumpers):
-    """Get list of available directions (not blocked by walls)."""
-    directions = []
-    if not bumpers['north']:
-        directions.append('north')
-    if not bumpers['south']:
-        directions.append('south')
-    if not bumpers['east']:
-        directions.append('east')
-    if not bumpers['west']:
-        directions.append('west')
-    return directions
-
-def move_towards_target(target_x, target_y, bumpers):
-    """Move towards a target position."""
-    current_x, current_y = agent_state['position']
-    
-    dx = target_x - current_x
-    dy = target_y - current_y
-    
-    if abs(dx) > abs(dy):
-        if dx > 0 and not bumpers['east']:
-            return 'east'
-        elif dx < 0 and not bumpers['west']:
-            return 'west'
-    else:
-        if dy > 0 and not bumpers['south']:
-            return 'south'
-        elif dy < 0 and not bumpers['north']:
-            return 'north'
-    
-    # Fallback
-    available = get_available_directions(bumpers)
-    if available:
-        return random.choice(available)
-    return 'suck'
-
-def improved_model_based_agent(bumpers, dirty):
+class ImprovedModelBasedAgent(ModelBasedReflexAgent):
     """
     Improved model-based agent that handles imperfect dirt sensors.
     
@@ -239,133 +90,136 @@ def improved_model_based_agent(bumpers, dirty):
     1. Maintain confidence levels for each square
     2. Revisit squares with low confidence
     3. Use probabilistic cleaning decisions
-    """
-    global agent_state
-    
-    # Infer current position
-    current_pos = infer_position_from_bumpers(bumpers)
-    agent_state['position'] = current_pos
-    agent_state['visited'].add(current_pos)
     
-    # Initialize confidence tracking if not exists
-    if 'confidence' not in agent_state:
-        agent_state['confidence'] = {}
-    
-    # Update confidence based on sensor reading
-    if current_pos not in agent_state['confidence']:
-        agent_state['confidence'][current_pos] = {'clean': 0, 'dirty': 0}
-    
-    if dirty:
-        agent_state['confidence'][current_pos]['dirty'] += 1
-    else:
-        agent_state['confidence'][current_pos]['clean'] += 1
-    
-    # Calculate confidence in current square being dirty
-    conf_data = agent_state['confidence'][current_pos]
-    total_readings = conf_data['clean'] + conf_data['dirty']
+    Sensor readings are counted per square in uint16 grids indexed [y, x]. Squares
+    still needing readings and squares never visited are kept in frontier indexes
+    that are updated as readings arrive, so picking the next target does not
+    rescan the room.
+    """
     
-    if total_readings > 0:
-        dirty_confidence = conf_data['dirty'] / total_readings
-    else:
-        dirty_confidence = 0.5  # Default uncertainty
+    __slots__ = ('clean_readings', 'dirty_readings', 'low_confidence', 'unvisited')
     
-    # Decision making with confidence threshold
-    confidence_threshold = 0.7
+    # Readings needed before a square's confidence is trusted
+    min_readings = 3
     
-    # If confident square is dirty, clean it
-    if dirty_confidence > confidence_threshold:
-        agent_state['cleaned'].add(current_pos)
-        agent_state['last_action'] = 'suck'
-        return 'suck'
+    def reset(self, seed=None):
+        """Reset the agent state for a new run (a seed restarts the random stream)."""
+        super().reset(seed)
+        shape = (self.height, self.width)
+        self.clean_readings = np.zeros(shape, dtype=np.uint16)
+        self.dirty_readings = np.zeros(shape, dtype=np.uint16)
+        self.low_confidence = FrontierIndex(*shape)              # Read, but too few readings
+        self.unvisited = FrontierIndex(*shape, fill=True)        # Never visited
     
-    # If confident square is clean, move on
-    elif dirty_confidence < (1 - confidence_threshold):
-        # Move to next unvisited square or low-confidence square
-        return find_next_target(bumpers)
+    def choose_action(self, percept):
+        walls = percept.walls
+        
+        # Dead-reckon the current position; until anchored, trust the sensor directly
+        current_pos = self.update_position(walls)
+        if current_pos is None:
+            return SUCK if percept.dirty else self.locate_action(walls)
+        self.mark_visited(current_pos)
+        x, y = current_pos
+        
+        # Update confidence based on sensor reading
+        if percept.dirty:
+            self.dirty_readings[y, x] += 1
+        else:
+            self.clean_readings[y, x] += 1
+        
+        # Calculate confidence in current square being dirty
+        dirty_readings = int(self.dirty_readings[y, x])
+        total_readings = int(self.clean_readings[y, x]) + dirty_readings
+        
+        # Keep the frontier indexes in step with the new reading
+        self.unvisited.discard(x, y)
+        if total_readings == 1:
+            self.low_confidence.add(x, y)
+        elif total_readings == self.min_readings:
+            self.low_confidence.discard(x, y)
+        
+        if total_readings > 0:
+            dirty_confidence = dirty_readings / total_readings
+        else:
+            dirty_confidence = 0.5  # Default uncertainty
+        
+        # Decision making with confidence threshold
+        confidence_threshold = 0.7
+        
+        # If confident square is dirty, clean it
+        if dirty_confidence > confidence_threshold:
+            self.cleaned[y, x] = 1
+            return SUCK
+        
+        # If confident square is clean, move on
+        elif dirty_confidence < (1 - confidence_threshold):
+            # Move to next unvisited square or low-confidence square
+            return self.find_next_target(walls)
+        
+        # If uncertain, clean to be safe (but with lower priority)
+        elif dirty_confidence > 0.5:
+            self.cleaned[y, x] = 1
+            return SUCK
+        
+        # Otherwise, explore
+        return self.find_next_target(walls)
     
-    # If uncertain, clean to be safe (but with lower priority)
-    elif dirty_confidence > 0.5:
-        agent_state['cleaned'].add(current_pos)
-        agent_state['last_action'] = 'suck'
-        return 'suck'
+    def straight_run(self, direction):
+        """Every square needs its own readings, so the improved agent never fast-forwards."""
+        return 0
     
-    # Otherwise, explore
-    return find_next_target(bumpers)
+    def find_next_target(self, walls):
+        """Find next target square to visit."""
+        current_x, current_y = self.position
+        
+        # Move to nearest low-confidence square (read, but fewer than 3 readings)
+        target = self.low_confidence.nearest(current_x, current_y)
+        
+        # Otherwise look for the nearest unvisited square
+        if target is None:
+            target = self.unvisited.nearest(current_x, current_y)
+        
+        if target is not None:
+            return self.move_towards_target(target[0], target[1], walls)
+        
+        # All squares visited, clean any remaining uncertain squares
+        return SUCK
 
-def find_next_target(bumpers):
-    """Find next target square to visit."""
-    global agent_state
-    
-    # Look for squares with low confidence
-    low_confidence_squares = []
-    for pos, conf_data in agent_state['confidence'].items():
-        total_readings = conf_data['clean'] + conf_data['dirty']
-        if total_readings < 3:  # Need more readings
-            low_confidence_squares.append(pos)
-    
-    if low_confidence_squares:
-        # Move to nearest low-confidence square
-        current_x, current_y = agent_state['position']
-        target = min(low_confidence_squares, 
-                    key=lambda p: abs(p[0] - current_x) + abs(p[1] - current_y))
-        return move_towards_target(target[0], target[1], bumpers)
+# Shared instance used wherever a plain agent function is expected
+improved_model_based_agent = ImprovedModelBasedAgent()
+
+def reset_improved_agent_state():
+    """Reset the shared improved_model_based_agent for a new run."""
+    improved_model_based_agent.reset()
+
+def test_imperfect_sensors(base_seed=0, cache=None):
+    """
+    Test all agents with imperfect dirt sensors.
     
-    # Look for unvisited squares
-    unvisited = []
-    for y in range(5):
-        for x in range(5):
-            if (x, y) not in agent_state['visited']:
-                unvisited.append((x, y))
+    Args:
+        base_seed: Seed of the first run (run i uses base_seed + i)
+        cache: Optional result_cache.ResultCache; cached episodes are not simulated again
+    """
     
-    if unvisited:
-        current_x, current_y = agent_state['position']
-        target = min(unvisited, 
-                    key=lambda p: abs(p[0] - current_x) + abs(p[1] - current_y))
-        return move_towards_target(target[0], target[1], bumpers)
+    from adaptive_comparison import compare_agents
     
-    # All squares visited, clean any remaining uncertain squares
-    return 'suck'
-
-def test_imperfect_sensors():
-    """Test all agents with imperfect dirt sensors."""
+    agent_names = ['Randomized', 'Simple Reflex', 'Model-Based', 'Improved Model-Based']
     
-    agents = [
-        ('Randomized', simple_randomized_agent),
-        ('Simple Reflex', simple_reflex_agent),
-        ('Model-Based', model_based_reflex_agent),
-        ('Improved Model-Based', improved_model_based_agent)
-    ]
+    # Episodes are added per agent until the 95% intervals are tight enough (fanned out over all cores)
+    summary = compare_agents(agent_names, room_size=5, error_rate=0.1, min_runs=20, max_runs=400,
+                             base_seed=base_seed, cache=cache)
     
     results = {}
     
-    for agent_name, agent_func in agents:
+    for row in summary.itertuples():
+        agent_name = row.agent
         print(f"\nTesting {agent_name} Agent:")
         print("-" * 40)
         
-        energies = []
-        successes = []
-        uncleaned_counts = []
-        
-        for run in range(20):  # 20 runs for testing
-            # Reset agent state
-            if 'Model-Based' in agent_name:
-                if agent_name == 'Improved Model-Based':
-                    reset_improved_agent_state()
-                else:
-                    reset_agent_state()
-            
-            energy, success, steps, uncleaned = imperfect_dirt_environment(
-                agent_func, room_size=5, sensor_error_rate=0.1, verbose=False
-            )
-            
-            energies.append(energy)
-            successes.append(success)
-            uncleaned_counts.append(uncleaned)
-        
         # Calculate performance metrics
-        avg_energy = np.mean(energies)
-        success_rate = np.mean(successes) * 100
-        avg_uncleaned = np.mean(uncleaned_counts)
+        avg_energy = row.energy
+        success_rate = row.success_rate * 100
+        avg_uncleaned = row.uncleaned
         
         # Calculate efficiency (energy per square cleaned)
         total_squares = 25  # 5x5 room
@@ -376,11 +230,13 @@ def test_imperfect_sensors():
             'avg_energy': avg_energy,
             'success_rate': success_rate,
             'avg_uncleaned': avg_uncleaned,
-            'efficiency': efficiency
+            'efficiency': efficiency,
+            'runs': row.runs
         }
         
-        print(f"  Average Energy: {avg_energy:.1f}")
-        print(f"  Success Rate: {success_rate:.1f}%")
+        print(f"  Episodes: {row.runs}" + ("" if row.converged else " (budget reached)"))
+        print(f"  Average Energy: {avg_energy:.1f} (95% CI {row.energy_low:.1f} to {row.energy_high:.1f})")
+        print(f"  Success Rate: {success_rate:.1f}% (95% CI {row.success_low * 100:.1f} to {row.success_high * 100:.1f})")
         print(f"  Average Uncleaned Squares: {avg_uncleaned:.1f}")
         print(f"  Efficiency (Energy/Cleaned): {efficiency:.2f}")
     
@@ -0,0 +1,197 @@
+"""
+Simulator Benchmark
+
+This module measures simulator throughput so performance regressions show up as
+numbers instead of slower study runs. Every agent runs a fixed set of seeded
+episodes in every environment and room size; the benchmark reports steps per
+second, episodes per second and the peak memory allocated during the episodes
+(measured with tracemalloc in a separate, untimed pass). Results are written as
+JSON and can be compared against a stored baseline with a regression threshold.
+
+Example:
+    python benchmark.py --out benchmark_results.json
+    python benchmark.py --baseline benchmark_results.json --threshold 0.15
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from environment import vacuum_environment
+from advanced_imperfect_sensors import imperfect_dirt_environment, ImprovedModelBasedAgent
+from model_based_agent import ModelBasedReflexAgent
+from simple_agent import RandomizedAgent, SimpleReflexAgent
+from percepts import NORTH
+from simulation_study import step_budget
+
+
+def core_policy(percept):
+    """Constant policy (always north) that isolates the cost of the environment loop."""
+    return NORTH
+
+core_policy.policy = core_policy
+
+# Agent name -> agent for a room size. Agent instances are reset with each episode's
+# seed, so every run does the same work.
+AGENTS = {
+    'environment_core': lambda room_size: core_policy,
+    'simple_randomized_agent': lambda room_size: RandomizedAgent.for_room(room_size, room_size),
+    'simple_reflex_agent': lambda room_size: SimpleReflexAgent.for_room(room_size, room_size),
+    'model_based_reflex_agent': lambda room_size: ModelBasedReflexAgent.for_room(room_size, room_size),
+    'improved_model_based_agent': lambda room_size: ImprovedModelBasedAgent.for_room(room_size, room_size),
+}
+
+# Environment name -> function running one episode and returning (energy, success, steps, ...)
+ENVIRONMENTS = {
+    'perfect': vacuum_environment,
+    'imperfect': lambda agent, **options: imperfect_dirt_environment(agent, sensor_error_rate=0.1, **options),
+}
+
+ROOM_SIZES = (5, 10, 100)
+
+
+def default_episodes(room_size):
+    """Episodes per cell: 20 for small rooms, fewer for large ones (at least 3)."""
+    return max(3, 20000 // step_budget(room_size))
+
+
+def run_episodes(agent, environment, room_size, n_episodes):
+    """Run seeded episodes 0..n_episodes-1 and return the total number of steps."""
+    max_steps = step_budget(room_size)
+    steps = 0
+    for seed in range(n_episodes):
+        steps += environment(agent, room_size=room_size, max_steps=max_steps, seed=seed)[2]
+    return steps
+
+
+def benchmark_cell(agent_name, environment_name, room_size, n_episodes=None, repeat=3):
+    """
+    Benchmark one agent in one environment and room size.
+
+    The episodes are timed repeat times and the fastest run is kept; peak
+    memory is measured in one extra pass under tracemalloc.
+
+    Args:
+        agent_name: Agent to run (key of AGENTS)
+        environment_name: Environment to run it in (key of ENVIRONMENTS)
+        room_size: Size of the square room
+        n_episodes: Seeded episodes per timed run (default: default_episodes(room_size))
+        repeat: Number of timed runs
+
+    Returns:
+        dict: Cell fields plus steps, seconds, steps_per_s, episodes_per_s and peak_kib
+    """
+    if n_episodes is None:
+        n_episodes = default_episodes(room_size)
+    agent = AGENTS[agent_name](room_size)
+    environment = ENVIRONMENTS[environment_name]
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        steps = run_episodes(agent, environment, room_size, n_episodes)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run_episodes(agent, environment, room_size, n_episodes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'agent': agent_name, 'environment': environment_name, 'room_size': room_size,
+            'episodes': n_episodes, 'steps': steps, 'seconds': seconds,
+            'steps_per_s': steps / seconds, 'episodes_per_s': n_episodes / seconds,
+            'peak_kib': peak / 1024}
+
+
+def run_benchmarks(agent_names=tuple(AGENTS), environment_names=tuple(ENVIRONMENTS),
+                   room_sizes=ROOM_SIZES, n_episodes=None, repeat=3, verbose=True):
+    """
+    Benchmark every agent, environment and room size combination.
+
+    Returns:
+        dict: {'meta': machine and library versions, 'results': one dict per cell}
+    """
+    results = []
+    for agent_name in agent_names:
+        for environment_name in environment_names:
+            for room_size in room_sizes:
+                result = benchmark_cell(agent_name, environment_name, room_size, n_episodes, repeat)
+                results.append(result)
+                if verbose:
+                    print(format_result(result))
+    meta = {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def format_result(result):
+    return (f"{result['agent']:<27} {result['environment']:<10} {result['room_size']:>4}  "
+            f"{result['steps_per_s']:>11,.0f} steps/s  {result['episodes_per_s']:>9,.1f} episodes/s  "
+            f"{result['peak_kib']:>8,.1f} KiB peak")
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare benchmark results with a baseline.
+
+    A cell regresses when its steps per second fall more than threshold (a
+    fraction) below the baseline's. Cells missing from either side are ignored.
+
+    Returns:
+        list: (result, baseline_result, relative_change) for every regressed cell
+    """
+    def key(result):
+        return result['agent'], result['environment'], result['room_size']
+
+    reference = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        base = reference.get(key(result))
+        if base is None:
+            continue
+        change = result['steps_per_s'] / base['steps_per_s'] - 1
+        if change < -threshold:
+            regressions.append((result, base, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulator throughput.")
+    parser.add_argument('--agents', nargs='+', choices=list(AGENTS), default=list(AGENTS))
+    parser.add_argument('--environments', nargs='+', choices=list(ENVIRONMENTS), default=list(ENVIRONMENTS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(ROOM_SIZES), help="Room sizes")
+    parser.add_argument('--episodes', type=int, help="Episodes per cell (default: scaled to the room size)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per cell (the fastest is kept)")
+    parser.add_argument('--out', help="Write the results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Allowed steps/s slowdown relative to the baseline (fraction)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.agents, args.environments, args.sizes, args.episodes, args.repeat)
+    if args.out:
+        with open(args.out, 'w') as out:
+            json.dump(results, out, indent=2)
+        print(f"Results saved to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for result, base, change in regressions:
+            print(f"REGRESSION {result['agent']} {result['environment']} {result['room_size']}: "
+                  f"{result['steps_per_s']:,.0f} vs {base['steps_per_s']:,.0f} steps/s ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
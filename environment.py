@@ -3,108 +3,538 @@ Task 1: Vacuum Environment Implementation
 
 This module implements the PEAS-compliant simulation environment for the vacuum cleaner robot.
 It includes room initialization, agent positioning, sensor simulation, and action execution.
+All single-episode environments share the run_episode() core, which takes a sensor
+model and a per-step observer as hooks. iter_episode() runs the same episode as a
+generator of step records, for online metrics and early stopping.
 """
 
+import time
+from collections import namedtuple
+
 import numpy as np
-import random
+from percepts import Agent, Macro, Percept, as_policy, action_name, BUMPERS, WALL_BITS, DX, DY, SUCK
+from rooms import ray, resolve_room_map
+from seeding import episode_streams
+
+class Room:
+    """
+    Dirt grid of a room with an incremental count of dirty squares.
+
+    The count is updated whenever a square is cleaned or dirtied, so checking
+    whether the room is clean is O(1) instead of summing the whole grid.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.remaining_dirt = int(np.count_nonzero(grid))
+
+    @classmethod
+    def random(cls, room_size, dirt_prob, room_map=None, rng=None):
+        """
+        Build a room where each square is dirty with probability dirt_prob.
+
+        The room is room_size x room_size unless a RoomMap is given, in which
+        case it takes the map's shape and blocked squares are never dirty. Dirt
+        is drawn from rng (a numpy Generator) if given, else from numpy's global state.
+        """
+        if room_map is None:
+            room_map = resolve_room_map(None, room_size)
+        return cls(room_map.random_dirt(dirt_prob, rng))
+
+    def suck(self, x, y):
+        """Clean square (x, y). Returns True if there was dirt to remove."""
+        if self.grid[y, x]:
+            self.grid[y, x] = False
+            self.remaining_dirt -= 1
+            return True
+        return False
+
+    def add_dirt(self, x, y):
+        """Make square (x, y) dirty. Returns True if it was clean before."""
+        if not self.grid[y, x]:
+            self.grid[y, x] = True
+            self.remaining_dirt += 1
+            return True
+        return False
+
+    def is_clean(self):
+        """Check whether no dirty squares remain."""
+        return self.remaining_dirt == 0
+
+def print_step(step, x, y, walls, dirty, percept, action):
+    """
+    Observer printing one step of an episode (used for verbose runs).
+
+    Args:
+        step: Step number (energy used so far)
+        x, y: Robot position before the action
+        walls, dirty: True wall mask and dirt state of the square
+        percept: Percept the agent saw (differs from the truth with noisy sensors)
+        action: Action code the agent chose
+    """
+    line = f"Step {step}: at ({x},{y}), dirty={dirty}"
+    if percept.dirty != dirty or percept.walls != walls:
+        line += f", sensed dirty={percept.dirty}, sensed bumpers={BUMPERS[percept.walls]}"
+    print(line)
+    if action == SUCK:
+        print(" → Sucked up dirt" if dirty else " → Sucked a clean square (no effect)")
+    elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+        print(f" → Moved {action_name(action)}")
+    else:
+        print(f" → Invalid or bump action: {action_name(action)}")
+
+class ObserverChain:
+    """Several observers combined into one (episode start/end hooks included)."""
+
+    def __init__(self, *observers):
+        self.observers = observers
+
+    def start_episode(self, room, room_map, x, y):
+        for observer in self.observers:
+            start = getattr(observer, 'start_episode', None)
+            if start is not None:
+                start(room, room_map, x, y)
+
+    def __call__(self, *step):
+        for observer in self.observers:
+            observer(*step)
+
+    def end_episode(self, energy_used, success):
+        for observer in self.observers:
+            end = getattr(observer, 'end_episode', None)
+            if end is not None:
+                end(energy_used, success)
+
+def _run_fast(policy, room, walls_at, x, y, max_steps, apply_noise):
+    """
+    Episode loop without observers.
+    
+    The dirt count is kept in a local and written back at the end, and the
+    noisy and noise-free cases get separate loops, so a step does no work
+    beyond the simulation itself.
+    """
+    grid = room.grid
+    remaining = room.remaining_dirt
+    percept = Percept()
+    steps = 0
+    success = False
+    if apply_noise is None:
+        while steps < max_steps:
+            if remaining == 0:
+                success = True
+                break
+            walls = walls_at[y][x]
+            percept.walls = walls
+            percept.dirty = dirty = grid[y, x]
+            action = policy(percept)
+            if action == SUCK:
+                if dirty:
+                    grid[y, x] = False
+                    remaining -= 1
+            elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+                x += DX[action]
+                y += DY[action]
+            steps += 1
+    else:
+        while steps < max_steps:
+            if remaining == 0:
+                success = True
+                break
+            walls = walls_at[y][x]
+            percept.walls = walls
+            percept.dirty = dirty = grid[y, x]
+            apply_noise(percept)
+            action = policy(percept)
+            if action == SUCK:
+                if dirty:
+                    grid[y, x] = False
+                    remaining -= 1
+            elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+                x += DX[action]
+                y += DY[action]
+            steps += 1
+    room.remaining_dirt = remaining
+    return steps, success, steps
+
+def resolve_macro(grid, wall_grid, x, y, macro, remaining, budget):
+    """
+    Carry out a macro-action in one pass over the row or column it covers.
+    
+    The outcome is exactly that of the primitive steps: move into the next square,
+    suck if it is dirty (except in the last square, where the agent takes over),
+    and repeat, each move and suck costing one unit of energy. The macro ends
+    early when the room becomes clean, when the step budget runs out, or after
+    entering a square whose walls differ from the expected ones.
+    
+    Args:
+        grid: Dirt grid (cleaned squares are updated in place)
+        wall_grid: Wall masks of the room map, indexed [y, x]
+        x, y: Starting position
+        macro: Macro with the direction and the expected wall masks
+        remaining: Dirty squares left in the room
+        budget: Steps left in the episode
+    
+    Returns:
+        tuple: (x, y, steps, cleaned, moved) with the new position, steps taken,
+               squares cleaned and squares moved
+    """
+    direction, expected = macro
+    squares = ray(grid, x, y, direction, len(expected))
+    n = len(squares)
+    mismatch = np.flatnonzero(ray(wall_grid, x, y, direction, n) != expected[:n])
+    stop = int(mismatch[0]) + 1 if mismatch.size else n
+    
+    # Steps taken once each square has been entered (and sucked, if dirty)
+    dirt = squares[:stop].astype(np.int64)
+    dirt[-1] = 0
+    ends = np.cumsum(dirt + 1)
+    steps = int(ends[-1])
+    if remaining <= steps - stop:
+        # The room is clean right after sucking its last dirty square
+        steps = int(ends[np.flatnonzero(dirt)[remaining - 1]])
+    steps = min(steps, budget)
+    
+    done = int(np.searchsorted(ends, steps, side='right'))   # Squares entered and sucked
+    moved = done + 1 if done < stop and steps > (ends[done - 1] if done else 0) else done
+    cleaned = int(dirt[:done].sum())
+    squares[:min(done, stop - 1)] = False
+    return x + DX[direction] * moved, y + DY[direction] * moved, steps, cleaned, moved
 
-def vacuum_environment(agent_function, room_size=5, dirt_prob=0.2, max_steps=1000, verbose=False):
+def _run_macro(agent, room, room_map, x, y, max_steps):
+    """
+    Episode loop for fast-forwarding agents (same semantics as _run_fast).
+    
+    The agent acts through act_macro(); macros are resolved by resolve_macro()
+    and their length reported back through end_macro().
+    """
+    act = agent.act_macro
+    grid = room.grid
+    walls_at = room_map.wall_rows
+    wall_grid = room_map.walls
+    remaining = room.remaining_dirt
+    percept = Percept()
+    steps = 0
+    success = False
+    while steps < max_steps:
+        if remaining == 0:
+            success = True
+            break
+        walls = walls_at[y][x]
+        percept.walls = walls
+        percept.dirty = dirty = grid[y, x]
+        action = act(percept)
+        if action.__class__ is Macro:
+            x, y, used, cleaned, moved = resolve_macro(grid, wall_grid, x, y, action, remaining,
+                                                       max_steps - steps)
+            remaining -= cleaned
+            steps += used
+            agent.end_macro(moved)
+            continue
+        if action == SUCK:
+            if dirty:
+                grid[y, x] = False
+                remaining -= 1
+        elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+            x += DX[action]
+            y += DY[action]
+        steps += 1
+    room.remaining_dirt = remaining
+    return steps, success, steps
+
+def _run_observed(steps, observer):
+    """
+    Report every step of an iter_episode() generator to an observer.
+    
+    Returns:
+        tuple: The episode result returned by the generator
+    """
+    percept = Percept()
+    while True:
+        try:
+            record = next(steps)
+        except StopIteration as finished:
+            return finished.value
+        percept.walls = record.sensed_walls
+        percept.dirty = record.sensed_dirty
+        observer(record.step, record.x, record.y, record.walls, record.dirty, percept, record.action)
+
+def _run_profiled(agent_function, policy, room, walls_at, x, y, max_steps, apply_noise, observer, profiler):
+    """
+    Episode loop timing each phase of every step (same semantics as _run_fast).
+    
+    Reads time.perf_counter_ns() between the termination check, sensing, the agent
+    call, the observer and acting. Totals stay in locals until the episode ends and
+    are then handed to profiler.add_episode() in profiling.PHASES order.
+    """
+    clock = time.perf_counter_ns
+    grid = room.grid
+    percept = Percept()
+    terminate_ns = sense_ns = agent_ns = observer_ns = act_ns = 0
+    checks = steps = 0
+    success = False
+    
+    start = now = clock()
+    while steps < max_steps:
+        checks += 1
+        clean = room.remaining_dirt == 0
+        tick = clock()
+        terminate_ns += tick - now
+        if clean:
+            success = True
+            now = tick
+            break
+        
+        walls = walls_at[y][x]
+        dirty = bool(grid[y, x])
+        percept.walls = walls
+        percept.dirty = dirty
+        if apply_noise is not None:
+            apply_noise(percept)
+        now = clock()
+        sense_ns += now - tick
+        
+        action = policy(percept)
+        tick = clock()
+        agent_ns += tick - now
+        
+        if observer is not None:
+            observer(steps, x, y, walls, dirty, percept, action)
+            now = clock()
+            observer_ns += now - tick
+            tick = now
+        
+        if action == SUCK:
+            room.suck(x, y)
+        elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+            x += DX[action]
+            y += DY[action]
+        steps += 1
+        now = clock()
+        act_ns += now - tick
+    
+    observed = steps if observer is not None else 0
+    profiler.add_episode(agent_function, (terminate_ns, sense_ns, agent_ns, observer_ns, act_ns),
+                         (checks, steps, steps, observed, steps), now - start)
+    return steps, success, steps
+
+def _prepare(agent_function, sensor_noise, agent_seed, noise_seed):
+    """
+    Reset the agent and the sensor model for a new episode.
+    
+    Returns:
+        tuple: (policy, apply_noise) with apply_noise None if there is no sensor model
+    """
+    policy = as_policy(agent_function)
+    if isinstance(agent_function, Agent):
+        agent_function.reset(agent_seed)
+    if sensor_noise is None:
+        return policy, None
+    sensor_noise.reset(noise_seed)
+    return policy, sensor_noise.apply
+
+def run_episode(agent_function, room, room_map, x, y, max_steps=1000, sensor_noise=None, observer=None,
+                agent_seed=None, noise_seed=None, profiler=None):
+    """
+    Simulation core shared by every single-episode environment.
+    
+    Each step: stop successfully if the room is clean, sense the true walls and
+    dirt, pass them through the sensor model, ask the agent, then carry out the
+    action. Sucking cleans the square; a move goes through unless a (true) wall
+    blocks it; every action, including bumps and invalid codes, costs one unit of
+    energy. Without an observer the loop takes a fast path with no hook calls;
+    without sensor noise, an agent whose fast_forward flag is set may also emit
+    macro-actions (see resolve_macro), which give the same result in fewer calls.
+    
+    Args:
+        agent_function: The agent program function, or an Agent (reset before the episode starts)
+        room: Room to clean (modified in place)
+        room_map: RoomMap the room was built on
+        x, y: Starting position
+        max_steps: Maximum number of steps before timeout
+        sensor_noise: Optional sensor model with reset() and apply(percept), which
+                      corrupts the percept in place (e.g. sensor_noise.SensorNoise)
+        observer: Optional callable observer(step, x, y, walls, dirty, percept, action)
+                  called for each step with the state the agent acted on (see
+                  print_step); observed episodes run through iter_episode(). If it
+                  has start_episode(room, room_map, x, y) and end_episode(energy_used,
+                  success) methods, they are called around the episode (see
+                  episode_trace.TraceRecorder).
+        agent_seed: Optional seed or Generator passed to the agent's reset()
+        noise_seed: Optional seed or Generator passed to the sensor model's reset()
+        profiler: Optional profiling.PhaseProfiler; the episode then runs on an
+                  instrumented loop that times each phase of every step
+    
+    Returns:
+        tuple: (total_energy_used, success_flag, steps_taken)
+    """
+    if observer is None and profiler is None:
+        policy, apply_noise = _prepare(agent_function, sensor_noise, agent_seed, noise_seed)
+        if apply_noise is None and getattr(agent_function, 'fast_forward', False):
+            return _run_macro(agent_function, room, room_map, x, y, max_steps)
+        return _run_fast(policy, room, room_map.wall_rows, x, y, max_steps, apply_noise)
+    
+    start_episode = getattr(observer, 'start_episode', None)
+    if start_episode is not None:
+        start_episode(room, room_map, x, y)
+    if profiler is None:
+        result = _run_observed(iter_episode(agent_function, room, room_map, x, y, max_steps, sensor_noise,
+                                            agent_seed, noise_seed), observer)
+    else:
+        policy, apply_noise = _prepare(agent_function, sensor_noise, agent_seed, noise_seed)
+        result = _run_profiled(agent_function, policy, room, room_map.wall_rows, x, y, max_steps,
+                               apply_noise, observer, profiler)
+    end_episode = getattr(observer, 'end_episode', None)
+    if end_episode is not None:
+        end_episode(result[0], result[1])
+    return result
+
+# One step of an episode, as yielded by iter_episode(): where the step was taken, what
+# the agent sensed, what was really there, the action, the dirt left afterwards and
+# the true and sensed wall masks
+StepRecord = namedtuple('StepRecord', ['step', 'x', 'y', 'action', 'sensed_dirty', 'dirty', 'remaining_dirt',
+                                       'walls', 'sensed_walls'])
+
+def iter_episode(agent_function, room, room_map, x, y, max_steps=1000, sensor_noise=None,
+                 agent_seed=None, noise_seed=None):
+    """
+    Run an episode as a generator, yielding a StepRecord after every step.
+    
+    The episode is exactly the one run_episode() would run. Nothing is buffered:
+    callers can fold the records into online statistics, pass them on to a sink,
+    or stop consuming (break, or close() the generator) to end the episode early.
+    Run to completion, the generator returns run_episode()'s result, e.g.
+    `result = yield from iter_episode(...)`.
+    
+    Args:
+        agent_function: The agent program function, or an Agent (reset before the episode starts)
+        room: Room to clean (modified in place)
+        room_map: RoomMap the room was built on
+        x, y: Starting position
+        max_steps: Maximum number of steps before timeout
+        sensor_noise: Optional sensor model with reset() and apply(percept)
+        agent_seed: Optional seed or Generator passed to the agent's reset()
+        noise_seed: Optional seed or Generator passed to the sensor model's reset()
+    
+    Yields:
+        StepRecord: One record per step
+    """
+    policy, apply_noise = _prepare(agent_function, sensor_noise, agent_seed, noise_seed)
+    grid = room.grid
+    walls_at = room_map.wall_rows
+    percept = Percept()
+    steps = 0
+    while steps < max_steps:
+        if room.remaining_dirt == 0:
+            return steps, True, steps
+        walls = walls_at[y][x]
+        dirty = bool(grid[y, x])
+        percept.walls = walls
+        percept.dirty = dirty
+        if apply_noise is not None:
+            apply_noise(percept)
+        action = policy(percept)
+        record_x, record_y = x, y
+        if action == SUCK:
+            room.suck(x, y)
+        elif 0 <= action < SUCK and not walls & WALL_BITS[action]:
+            x += DX[action]
+            y += DY[action]
+        steps += 1
+        yield StepRecord(steps - 1, record_x, record_y, action, percept.dirty, dirty, room.remaining_dirt,
+                         walls, percept.walls)
+    return steps, False, steps
+
+def episode_steps(agent_function, room_size=5, dirt_prob=0.2, max_steps=1000, room_map=None,
+                  sensor_noise=None, seed=None):
+    """
+    Set up a random episode like vacuum_environment() and stream its steps.
+    
+    With the same seed (and no sensor noise) the records describe exactly the
+    episode vacuum_environment(..., seed=seed) runs.
+    
+    Example:
+        for record in episode_steps(agent, room_size=20, seed=1):
+            if record.remaining_dirt <= 10:   # stop once 10 dirty squares are left
+                break
+    
+    Args:
+        agent_function: The agent program function, or an Agent
+        room_size: Size of the square room
+        dirt_prob: Probability that each square starts dirty
+        max_steps: Maximum number of steps before timeout
+        room_map: Optional floor plan (RoomMap or layout file path); overrides room_size
+        sensor_noise: Optional sensor model, e.g. sensor_noise.SensorNoise
+        seed: Optional int, SeedSequence or Generator (see seeding.episode_streams)
+    
+    Yields:
+        StepRecord: One record per step (see iter_episode)
+    """
+    streams = episode_streams(seed) if seed is not None else None
+    room_map = resolve_room_map(room_map, room_size)
+    room = Room.random(room_size, dirt_prob, room_map, streams and streams.room)
+    x, y = room_map.random_start(streams and streams.start)
+    return (yield from iter_episode(agent_function, room, room_map, x, y, max_steps, sensor_noise,
+                                    streams and streams.agent, streams and streams.noise))
+
+def vacuum_environment(agent_function, room_size=5, dirt_prob=0.2, max_steps=1000, verbose=False,
+                       room_map=None, observer=None, seed=None, profiler=None):
     """
     Simulation environment for vacuum cleaner robot.
     
     Args:
-        agent_function: The agent program function
+        agent_function: The agent program function, or an Agent (reset before the episode starts)
         room_size: Size of the square room (default 5x5)
         dirt_prob: Probability that each square starts dirty (default 0.2)
         max_steps: Maximum number of steps before timeout (default 1000)
         verbose: Whether to print debug information
+        room_map: Optional floor plan (RoomMap or layout file path); overrides room_size
+        observer: Optional per-step observer (see run_episode)
+        seed: Optional int, SeedSequence or Generator. The room, start position and
+              agent then draw from independent streams (see seeding.episode_streams)
+              instead of the global random state. Only Agent objects receive their
+              stream; a plain agent function keeps using the global state.
+        profiler: Optional profiling.PhaseProfiler timing the episode's phases
     
     Returns:
         tuple: (total_energy_used, success_flag, steps_taken)
     """
+    streams = episode_streams(seed) if seed is not None else None
     
     # 1. Build the room: each square has a dirt_prob probability of being dirty
-    room = np.random.random((room_size, room_size)) < dirt_prob
+    room_map = resolve_room_map(room_map, room_size)
+    room = Room.random(room_size, dirt_prob, room_map, streams and streams.room)
     
-    # 2. Put the robot in a random spot
-    x = random.randint(0, room_size - 1)
-    y = random.randint(0, room_size - 1)
-
-    energy_used = 0
-    steps_taken = 0
+    # 2. Put the robot in a random (passable) spot
+    x, y = room_map.random_start(streams and streams.start)
 
     if verbose:
         print("Starting room (1=dirty, 0=clean):")
-        print(room.astype(int))
+        print(room.grid.astype(int))
         print(f"Robot starts at ({x}, {y})\n")
+        observer = print_step if observer is None else ObserverChain(print_step, observer)
 
-    # 3. Keep going until energy runs out
-    while energy_used < max_steps:
-        # Stop if everything is clean
-        if np.sum(room) == 0:
-            if verbose:
-                print(f"All clean in {energy_used} steps!")
-            return energy_used, True, steps_taken
-        
-        # 4. Robot sensors
-        bumpers = {
-            "north": y == 0,
-            "south": y == room_size - 1,
-            "west": x == 0,
-            "east": x == room_size - 1
-        }
-        dirty_here = room[y, x]
-
-        if verbose:
-            print(f"Step {energy_used}: at ({x},{y}), dirty={dirty_here}")
-
-        # 5. Ask the robot what to do
-        action = agent_function(bumpers, dirty_here)
-
-        # 6. Carry out the action
-        if action == "suck":
-            room[y, x] = False   # clean the square
-            if verbose: print(" → Sucked up dirt")
-        elif action == "north" and not bumpers["north"]:
-            y -= 1
-            if verbose: print(" → Moved north")
-        elif action == "south" and not bumpers["south"]:
-            y += 1
-            if verbose: print(" → Moved south")
-        elif action == "west" and not bumpers["west"]:
-            x -= 1
-            if verbose: print(" → Moved west")
-        elif action == "east" and not bumpers["east"]:
-            x += 1
-            if verbose: print(" → Moved east")
-        else:
-            if verbose: print(f" → Invalid or bump action: {action}")
-
-        energy_used += 1
-        steps_taken += 1
+    # 3. Run the episode until the room is clean or energy runs out
+    energy_used, success, steps_taken = run_episode(agent_function, room, room_map, x, y,
+                                                    max_steps, observer=observer,
+                                                    agent_seed=streams and streams.agent,
+                                                    profiler=profiler)
 
-    # If we ran out of steps
     if verbose:
-        print(f"Stopped after {max_steps} steps. Dirt left: {np.sum(room)}")
-    return energy_used, False, steps_taken
+        if success:
+            print(f"All clean in {energy_used} steps!")
+        else:
+            print(f"Stopped after {max_steps} steps. Dirt left: {room.remaining_dirt}")
+    return energy_used, success, steps_taken
 
 def display_room_state(room, agent_x, agent_y):
     """
     Display the current room state with agent position.
+    
+    The frame is rendered in one vectorized pass (see replay.render_text).
     """
-    room_size = room.shape[0]
+    from replay import render_text
     print("Room state (D=dirty, C=clean, A=agent):")
-    for y in range(room_size):
-        row = ""
-        for x in range(room_size):
-            if x == agent_x and y == agent_y:
-                row += "A "
-            elif room[y, x]:
-                row += "D "
-            else:
-                row += "C "
-        print(row)
-    print()
+    print(render_text(room, agent_x, agent_y))
 
 if __name__ == "__main__":
     print("Environment module loaded successfully!")
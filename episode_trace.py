@@ -0,0 +1,153 @@
+"""
+Episode Trace Recording
+
+This module records what happens in an episode, step by step, for offline replay
+and analysis. A TraceRecorder is an environment observer: each step it stores
+(step, x, y, action, sensed dirt, actual dirt) into a preallocated structured
+array chunk, and full chunks are appended to a .npy file. No strings are built
+during the episode. The file header is fixed-length, so once the episode ends it
+is rewritten in place with the final row count. The starting room is saved next
+to the trace, so the whole episode can be reconstructed later.
+"""
+
+import os
+
+import numpy as np
+
+# One row per step; x, y is the robot position before the action
+TRACE_DTYPE = np.dtype([('step', '<u4'), ('x', '<u2'), ('y', '<u2'), ('action', 'i1'),
+                        ('sensed_dirty', '?'), ('dirty', '?')])
+
+_MAGIC = b'\x93NUMPY\x01\x00'
+_HEADER_SIZE = 192  # Total .npy header bytes (magic + length + dict), a multiple of 64
+
+
+def _npy_header(dtype, n_rows):
+    """Fixed-size .npy (version 1.0) header for a 1-D array of n_rows records."""
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                   'shape': (n_rows,)})
+    padding = _HEADER_SIZE - len(_MAGIC) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError("Trace header does not fit the fixed header size")
+    header = (header + ' ' * padding + '\n').encode('latin1')
+    return _MAGIC + len(header).to_bytes(2, 'little') + header
+
+
+def room_path(trace_path):
+    """Path of the file holding a trace's starting room (next to the trace)."""
+    root, _ = os.path.splitext(trace_path)
+    return root + '.room.npz'
+
+
+class TraceRecorder:
+    """
+    Observer that records every step of an episode.
+
+    With a path, rows go to a .npy file in chunks of chunk_size steps, so memory
+    stays bounded however long the episode is. Without a path, chunks are kept in
+    memory. Either way, trace() returns the recorded rows. One recorder records
+    one episode: the environment calls start_episode() before the first step,
+    which clears anything recorded earlier.
+
+    Example:
+        recorder = TraceRecorder('episode.npy')
+        vacuum_environment(agent, room_size=100, max_steps=20000, observer=recorder)
+        steps = load_trace('episode.npy', mmap=True)
+    """
+
+    def __init__(self, path=None, chunk_size=65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._buffer = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self._filled = 0
+        self._chunks = []      # Flushed chunks (in-memory recorders only)
+        self._file = None
+        self.n_rows = 0
+        self.start = None      # (grid, passable, x, y) at the start of the episode
+
+    def start_episode(self, room, room_map, x, y):
+        """Begin a new trace: remember the starting room and open the output file."""
+        self.close()
+        self._filled = 0
+        self._chunks = []
+        self.n_rows = 0
+        self.start = (room.grid.copy(), room_map.passable, x, y)
+        if self.path is not None:
+            np.savez(room_path(self.path), grid=self.start[0], passable=room_map.passable,
+                     start=np.array([x, y]))
+            self._file = open(self.path, 'wb')
+            self._file.write(_npy_header(TRACE_DTYPE, 0))
+
+    def __call__(self, step, x, y, walls, dirty, percept, action):
+        i = self._filled
+        self._buffer[i] = (step, x, y, action, percept.dirty, dirty)
+        self._filled = i + 1
+        if i + 1 == self.chunk_size:
+            self.flush()
+
+    def end_episode(self, energy_used, success):
+        """Flush the remaining rows and finalize the file header."""
+        self.close()
+
+    def flush(self):
+        """Write the buffered rows out (to the file, or to the in-memory chunk list)."""
+        rows = self._buffer[:self._filled]
+        if self._file is not None:
+            self._file.write(rows.tobytes())
+        elif len(rows):
+            self._chunks.append(rows.copy())
+        self.n_rows += self._filled
+        self._filled = 0
+
+    def close(self):
+        """Flush and, for file traces, rewrite the header with the final row count."""
+        if self._filled:
+            self.flush()
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.write(_npy_header(TRACE_DTYPE, self.n_rows))
+            self._file.close()
+            self._file = None
+
+    def trace(self):
+        """
+        All rows recorded so far.
+
+        Returns:
+            ndarray: Structured array with TRACE_DTYPE fields
+        """
+        if self.path is not None:
+            self.close()
+            return load_trace(self.path)
+        return np.concatenate(self._chunks + [self._buffer[:self._filled].copy()])
+
+
+def load_trace(path, mmap=False):
+    """
+    Load a recorded trace.
+
+    Args:
+        path: .npy file written by TraceRecorder
+        mmap: Memory-map the file instead of reading it (for very long traces)
+
+    Returns:
+        ndarray: Structured array with TRACE_DTYPE fields
+    """
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def load_start(path):
+    """
+    Load the starting state saved with a trace.
+
+    Returns:
+        tuple: (grid, passable, x, y) with the initial dirt grid and passability grid
+    """
+    with np.load(room_path(path)) as saved:
+        x, y = saved['start'].tolist()
+        return saved['grid'], saved['passable'], x, y
+
+
+if __name__ == "__main__":
+    print("Trace module loaded successfully!")
+    print("Pass TraceRecorder(path) as an environment observer, then load_trace(path) to analyse it.")
@@ -0,0 +1,207 @@
+"""
+Parallel Experiment Runner
+
+This module fans simulation jobs out over a process pool and gathers the
+per-episode results into a pandas DataFrame. A job is a dict describing one
+episode: agent name, room size, dirt probability, sensor error rate and seed.
+Optional keys select a layout file ('layout'), unreliable bumpers
+('bumper_miss_rate'), a step budget ('max_steps') and whether the agent is told
+the room's dimensions ('room_known'). Passing a result_cache.ResultCache reuses
+episodes simulated by earlier sweeps and only runs the new ones.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from environment import vacuum_environment
+from simple_agent import RandomizedAgent, SimpleReflexAgent
+from model_based_agent import ModelBasedReflexAgent
+from advanced_imperfect_sensors import imperfect_dirt_environment, ImprovedModelBasedAgent
+from rooms import load_room_map
+
+# Agent name -> Agent class (a fresh instance, sized for the room, runs every job)
+AGENTS = {
+    'Randomized': RandomizedAgent,
+    'Simple Reflex': SimpleReflexAgent,
+    'Model-Based': ModelBasedReflexAgent,
+    'Improved Model-Based': ImprovedModelBasedAgent
+}
+
+
+def make_jobs(agent_names, room_sizes=(5,), dirt_probs=(0.2,), error_rates=(0.0,),
+              n_runs=10, base_seed=0):
+    """
+    Build the job list for a full-factorial parameter sweep.
+
+    Run i of every cell uses seed base_seed + i, so all agents are tested on the
+    same sequence of starting rooms.
+
+    Args:
+        agent_names: Names of agents to test (keys of AGENTS)
+        room_sizes: Room sizes to test
+        dirt_probs: Dirt probabilities to test
+        error_rates: Dirt sensor error rates to test (0 uses the perfect-sensor environment)
+        n_runs: Number of episodes per cell
+        base_seed: Seed of the first run
+
+    Returns:
+        list: Job dicts accepted by run_job()
+    """
+    return [
+        {'agent': agent_name, 'room_size': room_size, 'dirt_prob': dirt_prob,
+         'error_rate': error_rate, 'seed': base_seed + run}
+        for agent_name in agent_names
+        for room_size in room_sizes
+        for dirt_prob in dirt_probs
+        for error_rate in error_rates
+        for run in range(n_runs)
+    ]
+
+
+def run_job(job):
+    """
+    Run one episode described by a job dict.
+
+    The job seed is passed to the environment, which splits it into independent
+    streams for the room, start position, sensor noise and agent (see seeding),
+    so a job gives the same result in any worker and in any order.
+
+    Returns:
+        dict: The job fields plus energy, success, steps and uncleaned
+    """
+    layout = job.get('layout')
+    room_map = load_room_map(layout) if layout else None
+    width, height = (room_map.width, room_map.height) if room_map else (job['room_size'],) * 2
+    agent_class = AGENTS[job['agent']]
+    agent = agent_class.for_room(width, height) if job.get('room_known', True) else agent_class()
+    if hasattr(agent, 'act_macro'):
+        agent.fast_forward = True   # Same results, fewer steps through the Python loop
+
+    max_steps = job.get('max_steps', 1000)
+    bumper_miss_rate = job.get('bumper_miss_rate', 0.0)
+    if job['error_rate'] > 0 or bumper_miss_rate > 0:
+        energy, success, steps, uncleaned = imperfect_dirt_environment(
+            agent, room_size=job['room_size'], dirt_prob=job['dirt_prob'],
+            max_steps=max_steps, sensor_error_rate=job['error_rate'],
+            room_map=room_map, bumper_miss_rate=bumper_miss_rate, seed=job['seed'])
+    else:
+        energy, success, steps = vacuum_environment(
+            agent, room_size=job['room_size'], dirt_prob=job['dirt_prob'],
+            max_steps=max_steps, room_map=room_map, seed=job['seed'])
+        uncleaned = np.nan
+
+    return dict(job, energy=int(energy), success=bool(success), steps=int(steps),
+                uncleaned=float(uncleaned))
+
+
+def run_jobs(jobs):
+    """Run a batch of jobs in one worker and return their result rows."""
+    return [run_job(job) for job in jobs]
+
+
+def _worker_count(max_workers, n_jobs):
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, n_jobs))
+
+
+def iter_experiments(jobs, max_workers=None, batch_size=None, cache=None):
+    """
+    Run jobs on a process pool and yield result rows as they finish.
+
+    Jobs are sent to workers in batches; rows are yielded batch by batch in
+    completion order, so callers can stream progress or checkpoint results.
+
+    Args:
+        jobs: List of job dicts (see make_jobs())
+        max_workers: Number of worker processes (default: all cores, 1 runs in-process)
+        batch_size: Jobs per worker task (default: about four tasks per worker)
+        cache: Optional ResultCache; cached rows are yielded first and new rows are stored
+
+    Yields:
+        dict: One result row per job (see run_job())
+    """
+    if cache is not None:
+        cached = cache.lookup(jobs)
+        yield from (row for row in cached if row is not None)
+        jobs = [job for job, row in zip(jobs, cached) if row is None]
+        if not jobs:
+            return
+
+    max_workers = _worker_count(max_workers, len(jobs))
+    if batch_size is None:
+        batch_size = max(1, len(jobs) // (max_workers * 4))
+
+    if max_workers == 1:
+        for i in range(0, len(jobs), batch_size):
+            rows = run_jobs(jobs[i:i + batch_size])
+            if cache is not None:
+                cache.store(rows)
+            yield from rows
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_jobs, jobs[i:i + batch_size])
+                   for i in range(0, len(jobs), batch_size)]
+        for future in as_completed(futures):
+            rows = future.result()
+            if cache is not None:
+                cache.store(rows)
+            yield from rows
+
+
+def run_experiments(jobs, max_workers=None, cache=None):
+    """
+    Run jobs on a process pool and collect the results.
+
+    Args:
+        jobs: List of job dicts (see make_jobs())
+        max_workers: Number of worker processes (default: all cores, 1 runs in-process)
+        cache: Optional ResultCache; only jobs missing from it are simulated
+
+    Returns:
+        DataFrame: One row per job, in job order
+    """
+    rows = cache.lookup(jobs) if cache is not None else [None] * len(jobs)
+    missing = [job for job, row in zip(jobs, rows) if row is None]
+    max_workers = _worker_count(max_workers, len(missing))
+
+    if not missing:
+        computed = []
+    elif max_workers == 1:
+        computed = [run_job(job) for job in missing]
+    else:
+        chunksize = max(1, len(missing) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            computed = list(executor.map(run_job, missing, chunksize=chunksize))
+    if cache is not None:
+        cache.store(computed)
+
+    computed = iter(computed)
+    return pd.DataFrame([row if row is not None else next(computed) for row in rows])
+
+
+def summarize(results):
+    """
+    Aggregate per-episode results into one row per sweep cell.
+
+    Returns:
+        DataFrame: avg_energy, success_rate (%), avg_uncleaned and runs per cell
+    """
+    cells = ['agent', 'room_size', 'dirt_prob', 'error_rate']
+    cells += [column for column in ('layout', 'bumper_miss_rate') if column in results]
+    summary = results.groupby(cells, sort=False, dropna=False).agg(
+        avg_energy=('energy', 'mean'),
+        success_rate=('success', 'mean'),
+        avg_uncleaned=('uncleaned', 'mean'),
+        runs=('seed', 'count'))
+    summary['success_rate'] *= 100
+    return summary.reset_index()
+
+
+if __name__ == "__main__":
+    jobs = make_jobs(list(AGENTS), n_runs=10)
+    print(summarize(run_experiments(jobs)).to_string(index=False))
@@ -0,0 +1,112 @@
+"""
+Frontier Index for Target Selection
+
+This module provides an incrementally maintained set of grid squares that answers
+"which member is nearest to (x, y)?" by Manhattan distance. Agents update it as
+readings arrive instead of rescanning their whole map on every step.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def ring_offsets(height, width):
+    """
+    All (dx, dy) offsets reachable inside a height x width grid, nearest first.
+
+    Offsets are sorted by Manhattan distance (ties by dy, then dx), and
+    ring_starts[d] is the index of the first offset at distance d.
+
+    Returns:
+        tuple: (dxs, dys, ring_starts) as read-only int arrays
+    """
+    dys, dxs = np.mgrid[-(height - 1):height, -(width - 1):width]
+    dxs, dys = dxs.ravel(), dys.ravel()
+    distance = np.abs(dxs) + np.abs(dys)
+    order = np.lexsort((dxs, dys, distance))
+    dxs, dys, distance = dxs[order], dys[order], distance[order]
+    ring_starts = np.searchsorted(distance, np.arange(distance[-1] + 2))
+    for array in (dxs, dys, ring_starts):
+        array.flags.writeable = False
+    return dxs, dys, ring_starts
+
+
+class FrontierIndex:
+    """
+    Set of squares on a height x width grid with nearest-member queries.
+
+    Membership is a uint8 grid plus a running count, so add/discard/len are O(1).
+    nearest() scans precomputed distance rings outward from the query square in
+    batches of doubling size, so its cost depends on how far away the nearest member is
+    rather than on the size of the room.
+    """
+
+    __slots__ = ('flags', 'count', '_dxs', '_dys', '_ring_starts')
+
+    # Rings searched in the first batch; later batches double in size
+    first_batch_rings = 8
+
+    def __init__(self, height, width, fill=False):
+        self.flags = np.full((height, width), 1 if fill else 0, dtype=np.uint8)
+        self.count = height * width if fill else 0
+        self._dxs, self._dys, self._ring_starts = ring_offsets(height, width)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, position):
+        x, y = position
+        return bool(self.flags[y, x])
+
+    def add(self, x, y):
+        """Add square (x, y) to the frontier."""
+        if not self.flags[y, x]:
+            self.flags[y, x] = 1
+            self.count += 1
+
+    def discard(self, x, y):
+        """Remove square (x, y) from the frontier if present."""
+        if self.flags[y, x]:
+            self.flags[y, x] = 0
+            self.count -= 1
+
+    def nearest(self, x, y):
+        """
+        Find the member closest to (x, y) by Manhattan distance.
+
+        Returns:
+            tuple: (x, y) of the nearest member, or None if the frontier is empty
+        """
+        if not self.count:
+            return None
+
+        height, width = self.flags.shape
+        ring_starts = self._ring_starts
+        max_distance = len(ring_starts) - 1
+        low, high = 0, self.first_batch_rings
+        while low < max_distance:
+            high = min(high, max_distance)
+            start, stop = ring_starts[low], ring_starts[high]
+            if stop - start > self.flags.size // 4:
+                # Far out, scanning the member grid directly is cheaper than more rings
+                return self._nearest_member(x, y)
+            xs = self._dxs[start:stop] + x
+            ys = self._dys[start:stop] + y
+            inside = np.flatnonzero((xs >= 0) & (xs < width) & (ys >= 0) & (ys < height))
+            hits = np.flatnonzero(self.flags[ys[inside], xs[inside]])
+            if hits.size:
+                first = inside[hits[0]]
+                return int(xs[first]), int(ys[first])
+            low, high = high, high * 2
+        return None
+
+    def _nearest_member(self, x, y):
+        """Nearest member found by scanning the whole grid (same tie order as the rings)."""
+        height, width = self.flags.shape
+        ys, xs = np.divmod(np.flatnonzero(self.flags), width)
+        dxs, dys = xs - x, ys - y
+        key = (np.abs(dxs) + np.abs(dys)) * (4 * height * width) + (dys + height) * (2 * width) + dxs
+        nearest = np.argmin(key)
+        return int(xs[nearest]), int(ys[nearest])
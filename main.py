@@ -7,8 +7,10 @@ This module provides a unified interface to run all components of the assignment
 import sys
 import os
 
-def run_environment_demo():
-    """Run Task 1: Environment demonstration."""
+from result_cache import ResultCache, CACHE_DIR
+
+def run_environment_demo(seed=None):
+    """Run Task 1: Environment demonstration (pass a seed to make it reproducible)."""
     print("=" * 60)
     print("TASK 1: ENVIRONMENT DEMONSTRATION")
     print("=" * 60)
@@ -17,43 +19,25 @@ def run_environment_demo():
     from simple_agent import simple_randomized_agent
     
     print("Testing environment with simple randomized agent...")
-    energy, success, steps = vacuum_environment(simple_randomized_agent, room_size=5, verbose=True)
+    energy, success, steps = vacuum_environment(simple_randomized_agent, room_size=5, verbose=True, seed=seed)
     print(f"\nResults: Success={success}, Energy={energy}, Steps={steps}")
 
-def run_agent_comparison():
-    """Run Task 2-3: Agent comparison."""
+def run_agent_comparison(base_seed=0, cache=None):
+    """Run Task 2-3: Agent comparison with adaptive sampling (run i of every agent uses seed base_seed + i)."""
     print("\n" + "=" * 60)
     print("TASKS 2-3: AGENT COMPARISON")
     print("=" * 60)
     
-    from environment import vacuum_environment
-    from simple_agent import simple_randomized_agent, simple_reflex_agent
-    from model_based_agent import model_based_reflex_agent, reset_agent_state
+    from adaptive_comparison import compare_agents, print_comparison
     
-    agents = [
-        ('Randomized', simple_randomized_agent),
-        ('Simple Reflex', simple_reflex_agent),
-        ('Model-Based', model_based_reflex_agent)
-    ]
+    agent_names = ['Randomized', 'Simple Reflex', 'Model-Based']
     
-    print("Running 10 tests for each agent...")
-    for agent_name, agent_func in agents:
-        print(f"\n{agent_name} Agent:")
-        energies = []
-        successes = []
-        
-        for run in range(10):
-            if agent_name == 'Model-Based':
-                reset_agent_state()
-            
-            energy, success, steps = vacuum_environment(agent_func, room_size=5, verbose=False)
-            energies.append(energy)
-            successes.append(success)
-        
-        print(f"  Average Energy: {sum(energies)/len(energies):.1f}")
-        print(f"  Success Rate: {sum(successes)/len(successes)*100:.1f}%")
+    print("Testing each agent until its 95% intervals are tight (at least 10, at most 400 runs)...")
+    results = compare_agents(agent_names, min_runs=10, round_runs=10, max_runs=400,
+                             base_seed=base_seed, cache=cache)
+    print_comparison(results)
 
-def run_simulation_study():
+def run_simulation_study(base_seed=0, cache=None):
     """Run Task 4: Simulation study."""
     print("\n" + "=" * 60)
     print("TASK 4: SIMULATION STUDY")
@@ -63,9 +47,9 @@ def run_simulation_study():
         from simulation_study import run_simulation_study, print_performance_table, create_performance_visualization
         
         print("Running comprehensive simulation study...")
-        print("Note: This may take a few minutes for 100x100 room...")
+        print("Finished episodes are cached; rerunning only simulates what changed.")
         
-        results = run_simulation_study()
+        results = run_simulation_study(base_seed=base_seed, cache=cache)
         print_performance_table(results)
         create_performance_visualization(results)
         
@@ -73,7 +57,7 @@ def run_simulation_study():
         print(f"Error importing simulation study: {e}")
         print("Make sure all required packages are installed: numpy, matplotlib, pandas")
 
-def run_robustness_analysis():
+def run_robustness_analysis(base_seed=0, cache=None):
     """Run Task 5: Robustness analysis."""
     print("\n" + "=" * 60)
     print("TASK 5: ROBUSTNESS ANALYSIS")
@@ -81,10 +65,10 @@ def run_robustness_analysis():
     
     from robustness_analysis import analyze_robustness, print_detailed_analysis
     
-    analyze_robustness()
-    print_detailed_analysis()
+    summary = analyze_robustness(base_seed=base_seed, cache=cache)
+    print_detailed_analysis(summary)
 
-def run_advanced_task():
+def run_advanced_task(base_seed=0, cache=None):
     """Run Advanced Task: Imperfect sensors."""
     print("\n" + "=" * 60)
     print("ADVANCED TASK: IMPERFECT SENSORS")
@@ -93,13 +77,20 @@ def run_advanced_task():
     try:
         from advanced_imperfect_sensors import test_imperfect_sensors
         
-        results = test_imperfect_sensors()
+        results = test_imperfect_sensors(base_seed, cache)
         
     except ImportError as e:
         print(f"Error importing advanced task: {e}")
 
-def main():
-    """Main function to run the complete assignment."""
+def main(seed=0, cache_dir=CACHE_DIR):
+    """
+    Main function to run the complete assignment.
+    
+    Args:
+        seed: Base seed passed to every task, so reruns reproduce the same numbers
+        cache_dir: Directory of the episode result cache shared by the tasks (None disables it)
+    """
+    cache = ResultCache(cache_dir) if cache_dir else None
     
     print("VACUUM CLEANER ROBOT AI ASSIGNMENT")
     print("=" * 60)
@@ -121,22 +112,22 @@ def main():
                 print("Goodbye!")
                 break
             elif choice == '1':
-                run_environment_demo()
+                run_environment_demo(seed)
             elif choice == '2':
-                run_agent_comparison()
+                run_agent_comparison(seed, cache)
             elif choice == '3':
-                run_simulation_study()
+                run_simulation_study(seed, cache)
             elif choice == '4':
-                run_robustness_analysis()
+                run_robustness_analysis(seed, cache)
             elif choice == '5':
-                run_advanced_task()
+                run_advanced_task(seed, cache)
             elif choice == '6':
                 print("Running complete assignment...")
-                run_environment_demo()
-                run_agent_comparison()
-                run_simulation_study()
-                run_robustness_analysis()
-                run_advanced_task()
+                run_environment_demo(seed)
+                run_agent_comparison(seed, cache)
+                run_simulation_study(seed, cache)
+                run_robustness_analysis(seed, cache)
+                run_advanced_task(seed, cache)
                 print("\n" + "=" * 60)
                 print("ASSIGNMENT COMPLETE!")
                 print("=" * 60)
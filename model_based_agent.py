@@ -5,196 +5,316 @@ This module implements a model-based reflex agent that maintains internal state
 and uses systematic exploration to ensure complete room coverage.
 """
 
-import numpy as np
-import random
-
-# Global state for the model-based agent
-agent_state = {
-    'position': None,    # Will be inferred from bumpers
-    'room_size': 5,      # Assumed room size
-    'visited': set(),    # Set of visited coordinates
-    'cleaned': set(),    # Set of cleaned coordinates
-    'mode': 'LOCATE',    # Current mode: LOCATE, EXPLORE
-    'exploration_path': [],  # Planned path for exploration
-    'path_index': 0,     # Current position in exploration path
-    'last_action': None  # Track last action for position inference
-}
+from functools import lru_cache
 
-def reset_agent_state():
-    """Reset the agent state for a new run."""
-    global agent_state
-    agent_state = {
-        'position': None,
-        'room_size': 5,
-        'visited': set(),
-        'cleaned': set(),
-        'mode': 'LOCATE',
-        'exploration_path': [],
-        'path_index': 0,
-        'last_action': None
-    }
+import numpy as np
+from percepts import (Agent, Macro, wall_mask, wall_mask_at, choose_open_move, random_chooser, OPEN_MOVE_NAMES,
+                      WALL_COUNT, DX, DY,
+                      WALL_NORTH, WALL_SOUTH, WALL_WEST, WALL_EAST,
+                      NORTH, SOUTH, WEST, EAST, SUCK)
+from rooms import open_room, ray
 
-def infer_position_from_bumpers(bumpers):
-    """Infer current position based on bumper sensors."""
+def _infer_position(walls, width=5, height=5):
+    """Infer current position from a wall mask."""
     # This is a simplified approach - in reality, we'd need more sophisticated tracking
     # For now, we'll use a simple heuristic based on wall proximity
+    right, bottom = width - 1, height - 1
+    middle_x, middle_y = width // 2, height // 2
     
     # Count walls to estimate position
-    wall_count = sum(bumpers.values())
+    wall_count = WALL_COUNT[walls]
+    north, south = walls & WALL_NORTH, walls & WALL_SOUTH
+    west, east = walls & WALL_WEST, walls & WALL_EAST
     
     if wall_count == 2:
         # Corner position
-        if bumpers['north'] and bumpers['west']:
+        if north and west:
             return (0, 0)  # Northwest corner
-        elif bumpers['north'] and bumpers['east']:
-            return (4, 0)  # Northeast corner
-        elif bumpers['south'] and bumpers['west']:
-            return (0, 4)  # Southwest corner
-        elif bumpers['south'] and bumpers['east']:
-            return (4, 4)  # Southeast corner
+        elif north and east:
+            return (right, 0)  # Northeast corner
+        elif south and west:
+            return (0, bottom)  # Southwest corner
+        elif south and east:
+            return (right, bottom)  # Southeast corner
     elif wall_count == 1:
         # Edge position
-        if bumpers['north']:
-            return (2, 0)  # Top edge
-        elif bumpers['south']:
-            return (2, 4)  # Bottom edge
-        elif bumpers['west']:
-            return (0, 2)  # Left edge
-        elif bumpers['east']:
-            return (4, 2)  # Right edge
+        if north:
+            return (middle_x, 0)  # Top edge
+        elif south:
+            return (middle_x, bottom)  # Bottom edge
+        elif west:
+            return (0, middle_y)  # Left edge
+        elif east:
+            return (right, middle_y)  # Right edge
     
     # Default to center if no walls detected
-    return (2, 2)
+    return (middle_x, middle_y)
 
-def generate_exploration_path():
-    """Generate a systematic path to visit all squares."""
-    path = []
-    
-    # Simple row-by-row exploration pattern
-    for y in range(5):
-        if y % 2 == 0:  # Even rows: left to right
-            for x in range(5):
-                path.append((x, y))
-        else:  # Odd rows: right to left
-            for x in range(4, -1, -1):
-                path.append((x, y))
+@lru_cache(maxsize=None)
+def position_table(width, height):
+    """Position estimate for every wall mask in a width x height room."""
+    return tuple(_infer_position(walls, width, height) for walls in range(16))
+
+def infer_position_from_bumpers(bumpers, width=5, height=5):
+    """Infer current position based on bumper sensors."""
+    return position_table(width, height)[wall_mask(bumpers)]
+
+@lru_cache(maxsize=None)
+def serpentine_path(width, height):
+    """
+    Boustrophedon (row-by-row, alternating direction) plan covering a room.
     
+    Plans are cached per room size and returned as a read-only int32 array of
+    flat square indices (y * width + x) in visiting order.
+    """
+    cells = np.arange(width * height, dtype=np.int32).reshape(height, width)
+    cells[1::2] = cells[1::2, ::-1]  # Odd rows: right to left
+    path = cells.ravel()
+    path.flags.writeable = False
     return path
 
+def generate_exploration_path(width=5, height=5):
+    """Generate a systematic path to visit all squares."""
+    return [(cell % width, cell // width) for cell in serpentine_path(width, height).tolist()]
+
 def get_available_directions(bumpers):
     """Get list of available directions (not blocked by walls)."""
-    directions = []
-    if not bumpers['north']:
-        directions.append('north')
-    if not bumpers['south']:
-        directions.append('south')
-    if not bumpers['east']:
-        directions.append('east')
-    if not bumpers['west']:
-        directions.append('west')
-    return directions
+    return list(OPEN_MOVE_NAMES[wall_mask(bumpers)])
+
+@lru_cache(maxsize=None)
+def room_wall_masks(width, height):
+    """Wall mask of every square of an open width x height room, indexed y * width + x."""
+    return tuple(wall_mask_at(x, y, width, height) for y in range(height) for x in range(width))
 
-def model_based_reflex_agent(bumpers, dirty):
+class ModelBasedReflexAgent(Agent):
     """
     Model-based reflex agent that maintains state and navigates systematically.
     
-    Args:
-        bumpers: Dictionary with boolean values for north, south, east, west
-        dirty: Boolean indicating if current square is dirty
+    The agent first drives to the northwest corner, where both bumpers fire, and
+    anchors its position there. From then on it tracks its position by dead
+    reckoning: every step it applies its last move and checks the bumpers against
+    the walls expected at the new square. A mismatch means the estimate is lost
+    and the agent re-anchors. Squares are covered along a serpentine plan, so a
+    full sweep costs about width * height moves.
+    
+    All state lives on the instance, so several agents can run at the same time.
+    Visited and cleaned squares are kept in uint8 grids indexed [y, x] together
+    with a running visited count, so coverage checks are O(1) and allocation-free.
     
-    Returns:
-        str: Action to take
+    With fast_forward set, straight runs of the plan are handed to the environment
+    as macro-actions. The environment resolves a run in one slice of the room and
+    gives control back as soon as the bumpers would have surprised the agent, so
+    the episode is step-for-step the same as without fast-forwarding.
     """
-    global agent_state
-    
-    # Infer current position
-    current_pos = infer_position_from_bumpers(bumpers)
-    agent_state['position'] = current_pos
-    agent_state['visited'].add(current_pos)
-    
-    # Rule 1: Always clean if dirty
-    if dirty:
-        agent_state['cleaned'].add(current_pos)
-        agent_state['last_action'] = 'suck'
-        return 'suck'
-    
-    # Mode: LOCATE - Try to reach a corner to establish position
-    if agent_state['mode'] == 'LOCATE':
-        # Check if we're at a corner
-        wall_count = sum(bumpers.values())
-        if wall_count >= 2:  # At a corner or edge
-            agent_state['mode'] = 'EXPLORE'
-            agent_state['exploration_path'] = generate_exploration_path()
-            agent_state['path_index'] = 0
-        else:
-            # Move towards a corner (prefer northwest)
-            if not bumpers['north']:
-                agent_state['last_action'] = 'north'
-                return 'north'
-            elif not bumpers['west']:
-                agent_state['last_action'] = 'west'
-                return 'west'
+    
+    __slots__ = ('width', 'height', 'wall_masks', 'model_walls', 'position', 'visited', 'visited_count',
+                 'visited_cells', 'cleaned', 'mode', 'exploration_path', 'path_index', 'last_action',
+                 'choice', 'fast_forward')
+    
+    # Shortest plan segment worth a macro-action (shorter runs are stepped normally)
+    min_macro_length = 16
+    
+    def __init__(self, width=5, height=None, seed=None, fast_forward=False):
+        self.width = width                                   # Room width (squares)
+        self.height = width if height is None else height    # Room height (squares)
+        self.wall_masks = room_wall_masks(self.width, self.height)
+        self.model_walls = open_room(self.width, self.height).walls  # Same masks as an [y, x] array
+        self.choice = random_chooser(seed)                   # Random choice for unplanned moves
+        self.fast_forward = fast_forward                     # Emit macro-actions (see act_macro)
+        self.reset()
+    
+    @classmethod
+    def for_room(cls, width, height):
+        return cls(width, height)
+    
+    def reset(self, seed=None):
+        """Reset the agent state for a new run (a seed restarts the random stream)."""
+        if seed is not None:
+            self.choice = random_chooser(seed)
+        shape = (self.height, self.width)
+        self.position = None         # Unknown until anchored at the northwest corner
+        self.visited = np.zeros(shape, dtype=np.uint8)  # 1 = visited
+        self.visited_cells = self.visited.ravel()       # Flat view, indexed like the plan
+        self.visited_count = 0       # Number of distinct squares visited
+        self.cleaned = np.zeros(shape, dtype=np.uint8)  # 1 = cleaned
+        self.mode = 'LOCATE'         # Current mode: LOCATE, EXPLORE
+        self.exploration_path = serpentine_path(self.width, self.height)  # Planned path (flat squares)
+        self.path_index = 0          # Current position in exploration path
+        self.last_action = None      # Last action, integrated into the position estimate
+    
+    def mark_visited(self, position):
+        """Record a visit to position (x, y), keeping visited_count up to date."""
+        x, y = position
+        if not self.visited[y, x]:
+            self.visited[y, x] = 1
+            self.visited_count += 1
+    
+    def update_position(self, walls):
+        """
+        Dead-reckon the position from the last action and confirm it with the bumpers.
+        
+        Returns:
+            tuple: Estimated (x, y), or None while the agent still has to anchor
+        """
+        position = self.position
+        if position is not None:
+            last_action = self.last_action
+            if last_action is not None and last_action < SUCK:
+                x = position[0] + DX[last_action]
+                y = position[1] + DY[last_action]
+                position = (x, y)
             else:
-                # Choose any available direction
-                available = get_available_directions(bumpers)
-                if available:
-                    action = random.choice(available)
-                    agent_state['last_action'] = action
-                    return action
-    
-    # Mode: EXPLORE - Systematically visit squares
-    if agent_state['mode'] == 'EXPLORE':
-        # Check if we've visited all squares
-        if len(agent_state['visited']) >= 25:  # 5x5 = 25 squares
-            agent_state['last_action'] = 'suck'
-            return 'suck'
+                x, y = position
+            # The bumpers must match the walls expected at the estimated square
+            if not (0 <= x < self.width and 0 <= y < self.height) or \
+                    walls != self.wall_masks[y * self.width + x]:
+                position = None
+                self.mode = 'LOCATE'
+        elif walls & WALL_NORTH and walls & WALL_WEST:
+            position = (0, 0)  # Anchored at the northwest corner
+            self.mode = 'EXPLORE'
+        self.position = position
+        return position
+    
+    def locate_action(self, walls):
+        """Move towards the northwest corner to anchor the position estimate."""
+        if not walls & WALL_NORTH:
+            return NORTH
+        if not walls & WALL_WEST:
+            return WEST
+        return choose_open_move(walls, self.choice)
+    
+    def move_towards_target(self, target_x, target_y, walls):
+        """Move towards a target position."""
+        current_x, current_y = self.position
         
-        # Find next unvisited square
-        next_target = None
-        for i in range(agent_state['path_index'], len(agent_state['exploration_path'])):
-            target = agent_state['exploration_path'][i]
-            if target not in agent_state['visited']:
-                next_target = target
-                agent_state['path_index'] = i
-                break
+        # Calculate direction to target
+        dx = target_x - current_x
+        dy = target_y - current_y
         
-        if next_target:
-            # Move towards target
-            target_x, target_y = next_target
-            current_x, current_y = current_pos
-            
-            # Calculate direction to target
-            dx = target_x - current_x
-            dy = target_y - current_y
-            
-            # Choose direction based on largest difference
-            if abs(dx) > abs(dy):
-                if dx > 0 and not bumpers['east']:
-                    agent_state['last_action'] = 'east'
-                    return 'east'
-                elif dx < 0 and not bumpers['west']:
-                    agent_state['last_action'] = 'west'
-                    return 'west'
-            else:
-                if dy > 0 and not bumpers['south']:
-                    agent_state['last_action'] = 'south'
-                    return 'south'
-                elif dy < 0 and not bumpers['north']:
-                    agent_state['last_action'] = 'north'
-                    return 'north'
+        # Choose direction based on largest difference
+        if abs(dx) > abs(dy):
+            if dx > 0 and not walls & WALL_EAST:
+                return EAST
+            elif dx < 0 and not walls & WALL_WEST:
+                return WEST
+        else:
+            if dy > 0 and not walls & WALL_SOUTH:
+                return SOUTH
+            elif dy < 0 and not walls & WALL_NORTH:
+                return NORTH
         
         # If can't move towards target, choose any available direction
-        available = get_available_directions(bumpers)
-        if available:
-            action = random.choice(available)
-            agent_state['last_action'] = action
-            return action
-    
-    # Fallback
-    agent_state['last_action'] = 'suck'
-    return 'suck'
+        return choose_open_move(walls, self.choice)
+    
+    def act(self, percept):
+        """
+        Choose an action for this step.
+        
+        Args:
+            percept: Percept with the wall mask and dirt flag for this step
+        
+        Returns:
+            int: Action code
+        """
+        action = self.choose_action(percept)
+        self.last_action = action
+        return action
+    
+    def act_macro(self, percept):
+        """
+        Choose an action, or a Macro covering the straight run of the plan ahead.
+        
+        Returns:
+            int or Macro: Action code, or a macro-action for the environment to resolve
+        """
+        action = self.act(percept)
+        if action < SUCK and self.position is not None:
+            # Cheap test first: the plan must reach min_macro_length squares straight ahead
+            x, y = self.position
+            length = self.min_macro_length
+            ahead_x, ahead_y = x + DX[action] * length, y + DY[action] * length
+            last = self.path_index + length - 1
+            if 0 <= ahead_x < self.width and 0 <= ahead_y < self.height and \
+                    last < len(self.exploration_path) and \
+                    self.exploration_path[last] == ahead_y * self.width + ahead_x:
+                length = self.straight_run(action)
+                if length >= self.min_macro_length:
+                    return Macro(action, ray(self.model_walls, x, y, action, length))
+        return action
+    
+    def straight_run(self, direction):
+        """
+        Number of squares ahead in direction that the plan visits next, in order.
+        
+        Along such a run the agent would just suck where dirty and keep moving, so
+        the whole run can be a single macro-action.
+        """
+        x, y = self.position
+        squares = ray(self.visited, x, y, direction, self.width + self.height)
+        start = self.path_index
+        planned = self.exploration_path[start:start + len(squares)]
+        cells = y * self.width + x + (DX[direction] + DY[direction] * self.width) * \
+            np.arange(1, len(planned) + 1)
+        on_plan = (planned == cells) & (squares[:len(planned)] == 0)
+        return len(on_plan) if on_plan.all() else int(on_plan.argmin())
+    
+    def end_macro(self, moved):
+        """
+        Catch up after the environment moved the agent moved squares along a macro.
+        
+        The squares passed through are marked visited, and the position is left one
+        square short with the move as last action, so the next percept checks the
+        bumpers at the final square exactly as a normal step would.
+        """
+        x, y = self.position
+        direction = self.last_action
+        ray(self.visited, x, y, direction, moved - 1)[:] = 1
+        self.visited_count += moved - 1
+        self.position = (x + DX[direction] * (moved - 1), y + DY[direction] * (moved - 1))
+    
+    def choose_action(self, percept):
+        walls = percept.walls
+        position = self.update_position(walls)
+        if position is not None:
+            self.mark_visited(position)
+        
+        # Rule 1: Always clean if dirty
+        if percept.dirty:
+            if position is not None:
+                self.cleaned[position[1], position[0]] = 1
+            return SUCK
+        
+        # Mode: LOCATE - Reach the northwest corner to establish position
+        if position is None:
+            return self.locate_action(walls)
+        
+        # Mode: EXPLORE - Follow the serpentine plan
+        # Check if we've visited all squares
+        if self.visited_count >= self.visited.size:  # every square of the room
+            return SUCK
+        
+        # Find next unvisited square, resuming from where the plan left off
+        path = self.exploration_path
+        visited = self.visited_cells
+        i = self.path_index
+        while i < len(path) and visited[path[i]]:
+            i += 1
+        self.path_index = i
+        
+        # Move towards target
+        target_y, target_x = divmod(int(path[i]), self.width)
+        return self.move_towards_target(target_x, target_y, walls)
+
+# Shared instance used wherever a plain agent function is expected
+model_based_reflex_agent = ModelBasedReflexAgent()
+
+def reset_agent_state():
+    """Reset the shared model_based_reflex_agent for a new run."""
+    model_based_reflex_agent.reset()
 
 if __name__ == "__main__":
     print("Model-Based Reflex Agent module loaded successfully!")
-    print("Use model_based_reflex_agent() function for systematic exploration.")
-    print("Don't forget to call reset_agent_state() before each simulation!")
+    print("Use ModelBasedReflexAgent() (or the shared model_based_reflex_agent) for systematic exploration.")
+    print("Environments reset the agent at the start of every episode.")
+    print("Pass fast_forward=True to resolve straight runs of the plan as macro-actions.")
@@ -0,0 +1,170 @@
+"""
+Percept and Action Encoding
+
+This module defines the compact interface between the environment and the agents.
+Bumper readings are packed into a 4-bit wall mask and actions are small integer
+codes, so per-step lookups go through precomputed tables instead of building dicts
+and lists. The original dict-of-bumpers / action-name interface stays available
+through thin adapters, so existing agent functions keep working unchanged.
+"""
+
+import random
+from collections import namedtuple
+
+from seeding import ChoiceStream
+
+# Integer action codes (the first four are also the bumper directions)
+NORTH, SOUTH, WEST, EAST, SUCK = range(5)
+INVALID = -1
+ACTION_NAMES = ("north", "south", "west", "east", "suck")
+ACTION_CODES = {name: code for code, name in enumerate(ACTION_NAMES)}
+
+# Wall mask bits, indexed by direction code
+WALL_NORTH, WALL_SOUTH, WALL_WEST, WALL_EAST = 1, 2, 4, 8
+WALL_BITS = (WALL_NORTH, WALL_SOUTH, WALL_WEST, WALL_EAST)
+
+# Position change for each action code
+DX = (0, 0, -1, 1, 0)
+DY = (-1, 1, 0, 0, 0)
+
+# Macro-action: move len(expected_walls) squares in one direction, sucking where dirty
+# on the way. expected_walls holds the wall mask the agent expects at each square it
+# enters; the environment hands control back early at the first square that differs.
+Macro = namedtuple('Macro', ['direction', 'expected_walls'])
+
+
+class Bumpers(dict):
+    """
+    Bumper dict as seen by legacy agents, remembering the wall mask it came from.
+
+    One instance per mask is built up front (see BUMPERS), so the environment
+    never allocates a dict per step. Agents must treat it as read-only.
+    """
+
+    __slots__ = ('mask',)
+
+    def __init__(self, mask):
+        super().__init__(north=bool(mask & WALL_NORTH), south=bool(mask & WALL_SOUTH),
+                         west=bool(mask & WALL_WEST), east=bool(mask & WALL_EAST))
+        self.mask = mask
+
+
+class Percept:
+    """Sensor reading for one step: wall mask and dirt flag. Reused across steps."""
+
+    __slots__ = ('walls', 'dirty')
+
+    def __init__(self, walls=0, dirty=False):
+        self.walls = walls
+        self.dirty = dirty
+
+
+# Lookup tables indexed by wall mask. Open moves keep the north, south, east, west
+# order the agents have always used, so random choices are unchanged.
+BUMPERS = tuple(Bumpers(mask) for mask in range(16))
+OPEN_MOVES = tuple(tuple(code for code in (NORTH, SOUTH, EAST, WEST) if not mask & WALL_BITS[code])
+                   for mask in range(16))
+OPEN_MOVE_NAMES = tuple(tuple(ACTION_NAMES[code] for code in moves) for moves in OPEN_MOVES)
+WALL_COUNT = tuple(bin(mask).count('1') for mask in range(16))
+
+
+def wall_mask(bumpers):
+    """Convert a bumper dict to a wall mask (free for dicts taken from BUMPERS)."""
+    mask = getattr(bumpers, 'mask', None)
+    if mask is None:
+        mask = ((WALL_NORTH if bumpers['north'] else 0) | (WALL_SOUTH if bumpers['south'] else 0) |
+                (WALL_WEST if bumpers['west'] else 0) | (WALL_EAST if bumpers['east'] else 0))
+    return mask
+
+
+def wall_mask_at(x, y, width, height):
+    """Wall mask of square (x, y) in an open width x height room."""
+    return ((WALL_NORTH if y == 0 else 0) | (WALL_SOUTH if y == height - 1 else 0) |
+            (WALL_WEST if x == 0 else 0) | (WALL_EAST if x == width - 1 else 0))
+
+
+def action_name(code):
+    """Action name for a code, or 'invalid'."""
+    return ACTION_NAMES[code] if 0 <= code <= SUCK else 'invalid'
+
+
+def choose_open_move(walls, choice=random.choice):
+    """Pick a random move that is not blocked by a wall (suck if boxed in)."""
+    moves = OPEN_MOVES[walls]
+    return choice(moves) if moves else SUCK
+
+
+def random_chooser(seed=None):
+    """
+    Random choice function for an agent.
+
+    Without a seed this is random.choice on the global state (the behaviour agents
+    have always had); with a seed or Generator it draws from a private ChoiceStream.
+    """
+    return random.choice if seed is None else ChoiceStream(seed).choice
+
+
+def legacy_policy(agent_function):
+    """
+    Wrap an agent taking (bumpers, dirty) and returning an action name as a policy.
+
+    Returns:
+        function: Policy taking a Percept and returning an action code
+    """
+    def policy(percept):
+        return ACTION_CODES.get(agent_function(BUMPERS[percept.walls], percept.dirty), INVALID)
+    return policy
+
+
+def as_policy(agent_function):
+    """
+    Get the percept-based policy for an agent.
+
+    Agent functions that have a native Percept -> code implementation expose it as
+    their `policy` attribute; any other (bumpers, dirty) function is adapted.
+    """
+    policy = getattr(agent_function, 'policy', None)
+    if policy is not None:
+        return policy
+    return legacy_policy(agent_function)
+
+
+class Agent:
+    """
+    Base class for agents that keep their state on the instance.
+
+    Subclasses implement reset() and act(percept). Because every instance owns its
+    state, any number of agents can run side by side (interleaved episodes,
+    threads) without interfering. Agents that make random choices take a seed (or
+    Generator) in reset(), so an environment can give each agent its own stream.
+    Instances are also callable with the legacy (bumpers, dirty) arguments and
+    return an action name ('invalid' for codes outside the action set).
+
+    Agents that can fast-forward implement act_macro(percept), which may return a
+    Macro instead of an action code, and end_macro(moved), which the environment
+    calls with the number of squares the macro actually moved. Environments only
+    use them when the agent's fast_forward flag is set.
+    """
+
+    __slots__ = ()
+
+    fast_forward = False
+
+    @classmethod
+    def for_room(cls, width, height):
+        """Build an agent for a width x height room (agents that ignore the size just call cls())."""
+        return cls()
+
+    def reset(self, seed=None):
+        """Forget everything learned in the previous episode (a seed restarts the agent's random stream)."""
+
+    def act(self, percept):
+        """Return the action code for this step's Percept."""
+        raise NotImplementedError
+
+    @property
+    def policy(self):
+        return self.act
+
+    def __call__(self, bumpers, dirty):
+        return action_name(self.act(Percept(wall_mask(bumpers), dirty)))
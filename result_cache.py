@@ -0,0 +1,197 @@
+"""
+Result Cache for Experiment Sweeps
+
+This module keeps per-episode results on disk so sweeps only simulate what
+changed. Results are grouped into cells: one agent, one environment configuration.
+Each cell is stored as a .npz file of columns (seed, energy, success, steps,
+uncleaned), named by a hash of the agent's identity, a version hash of the source
+code the episode depends on, and the configuration. Editing an agent or the
+environment therefore changes the key and old results are simply never read
+again; least recently used cells are evicted once the cache exceeds its size limit.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+CACHE_DIR = '.result_cache'
+
+# Modules whose source determines every episode's outcome, whatever the agent
+ENGINE_MODULES = ('environment', 'advanced_imperfect_sensors', 'frontier', 'rooms', 'sensor_noise',
+                  'seeding', 'percepts', 'experiment_runner')
+
+# Configuration fields that define a cell, with the value run_job() assumes when missing
+CONFIG_DEFAULTS = {'agent': None, 'room_size': 5, 'dirt_prob': 0.2, 'error_rate': 0.0,
+                   'max_steps': 1000, 'layout': None, 'bumper_miss_rate': 0.0, 'room_known': True}
+
+OUTCOMES = ('energy', 'success', 'steps', 'uncleaned')
+
+
+def _file_digest(path):
+    with open(path, 'rb') as source:
+        return hashlib.sha256(source.read()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_version(agent_class):
+    """
+    Version hash of the source an agent's episodes depend on.
+
+    Covers the modules defining the agent class and its base classes plus the
+    simulation engine modules.
+    """
+    paths = {inspect.getsourcefile(cls) for cls in agent_class.__mro__ if cls is not object}
+    for name in ENGINE_MODULES:
+        __import__(name)
+        paths.add(inspect.getsourcefile(sys.modules[name]))
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode())
+        digest.update(_file_digest(path).encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _layout_digest(path, mtime):
+    return _file_digest(path)
+
+
+def cell_config(job):
+    """
+    The configuration part of a job (everything but the seed), with defaults filled in.
+
+    Layout files are identified by their content, not their path.
+    """
+    config = {field: job.get(field, default) for field, default in CONFIG_DEFAULTS.items()}
+    if config['layout']:
+        path = os.path.abspath(config['layout'])
+        config['layout'] = _layout_digest(path, os.path.getmtime(path))
+    return config
+
+
+class ResultCache:
+    """
+    On-disk cache of per-episode results, one .npz file per sweep cell.
+
+    Example:
+        cache = ResultCache()
+        results = run_experiments(jobs, cache=cache)   # only uncached jobs are simulated
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def cell_key(self, job):
+        """Content hash identifying the cell a job belongs to."""
+        from experiment_runner import AGENTS
+
+        agent_class = AGENTS[job['agent']]
+        identity = f"{agent_class.__module__}.{agent_class.__qualname__}"
+        payload = json.dumps([identity, code_version(agent_class), cell_config(job)], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _load(self, key):
+        """Stored columns of a cell keyed by seed, or an empty dict."""
+        path = self._path(key)
+        try:
+            with np.load(path) as cell:
+                columns = {name: cell[name].tolist() for name in ('seed',) + OUTCOMES}
+        except (OSError, ValueError, KeyError):
+            return {}
+        os.utime(path)  # Mark as recently used for eviction
+        return {seed: tuple(columns[name][i] for name in OUTCOMES)
+                for i, seed in enumerate(columns['seed'])}
+
+    def lookup(self, jobs):
+        """
+        Cached result rows for a list of jobs.
+
+        Returns:
+            list: One entry per job: its result dict (like run_job() returns), or None
+                  if the episode has not been cached yet
+        """
+        rows = []
+        cells = {}
+        for job in jobs:
+            key = self.cell_key(job)
+            if key not in cells:
+                cells[key] = self._load(key)
+            outcome = cells[key].get(job['seed'])
+            if outcome is None:
+                rows.append(None)
+            else:
+                energy, success, steps, uncleaned = outcome
+                rows.append(dict(job, energy=int(energy), success=bool(success), steps=int(steps),
+                                 uncleaned=float(uncleaned)))
+        return rows
+
+    def store(self, rows):
+        """Add result rows to their cells, then evict old cells if the cache is too big."""
+        if not rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        by_cell = {}
+        for row in rows:
+            by_cell.setdefault(self.cell_key(row), []).append(row)
+
+        for key, cell_rows in by_cell.items():
+            cell = self._load(key)
+            for row in cell_rows:
+                cell[row['seed']] = tuple(row[name] for name in OUTCOMES)
+            seeds = sorted(cell)
+            columns = {'seed': np.array(seeds, dtype=np.int64),
+                       'energy': np.array([cell[seed][0] for seed in seeds], dtype=np.int64),
+                       'success': np.array([cell[seed][1] for seed in seeds], dtype=bool),
+                       'steps': np.array([cell[seed][2] for seed in seeds], dtype=np.int64),
+                       'uncleaned': np.array([cell[seed][3] for seed in seeds], dtype=np.float64)}
+            # Write to a temporary file first so readers never see a partial cell
+            handle, temp_path = tempfile.mkstemp(suffix='.npz', dir=self.directory)
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.savez(temp_file, **columns)
+            os.replace(temp_path, self._path(key))
+        self.evict()
+
+    def size(self):
+        """Total size of the cached cells in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self):
+        """Delete least recently used cells until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        """Delete every cached cell."""
+        for _, _, name in self._entries():
+            os.remove(os.path.join(self.directory, name))
+
+
+if __name__ == "__main__":
+    cache = ResultCache()
+    print(f"Result cache in {cache.directory}: {len(cache._entries())} cells, "
+          f"{cache.size() / 2**20:.1f} MB (limit {cache.max_bytes / 2**20:.0f} MB)")
@@ -1,213 +1,144 @@
 """
 Task 5: Robustness Analysis for Various Scenarios
 
-This module analyzes how agent implementations perform under challenging conditions
-and provides detailed recommendations for each scenario.
+This module measures how the agents cope with challenging conditions. Every agent
+runs through every scenario by Monte Carlo simulation on a fixed list of seeds, and
+the report gives the measured mean energy and success rate with 95% confidence
+intervals. Episodes run in parallel on all cores. Each (scenario, agent) cell
+stops drawing seeds as soon as its intervals are tight enough, so the report is
+cheap to regenerate after every change.
 """
 
-def analyze_robustness():
-    """Analyze agent robustness across different scenarios."""
-    
+import os
+
+from adaptive_comparison import run_adaptive, print_comparison
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+AGENT_NAMES = ('Randomized', 'Simple Reflex', 'Model-Based', 'Improved Model-Based')
+
+# Scenario name -> (description, job fields overriding the default 5x5 perfect-sensor episode)
+SCENARIOS = {
+    "Rectangular Room": ("Unknown 12x6 rectangle (agents assume the default 5x5)",
+                         {'layout': os.path.join(LAYOUT_DIR, 'rectangle.txt'), 'room_known': False}),
+    "Irregular Shape": ("Two rooms connected by a hallway",
+                        {'layout': os.path.join(LAYOUT_DIR, 'two_rooms.txt')}),
+    "Obstacles": ("Squares that cannot be passed through",
+                  {'layout': os.path.join(LAYOUT_DIR, 'obstacles.txt')}),
+    "Imperfect Dirt Sensor": ("10% false dirt readings", {'error_rate': 0.1}),
+    "Imperfect Bumper Sensor": ("10% missed wall detections", {'bumper_miss_rate': 0.1}),
+}
+
+
+def scenario_job(scenario, agent_name, max_steps=1000):
+    """
+    Job template (everything but the seed) running one agent through one scenario.
+
+    Returns:
+        dict: Job fields for experiment_runner.run_job(), tagged with the scenario name
+    """
+    _, overrides = SCENARIOS[scenario]
+    return dict({'scenario': scenario, 'agent': agent_name, 'room_size': 5, 'dirt_prob': 0.2,
+                 'error_rate': 0.0, 'max_steps': max_steps}, **overrides)
+
+
+def run_robustness_study(agent_names=AGENT_NAMES, scenarios=tuple(SCENARIOS), min_runs=20,
+                         max_runs=200, round_runs=20, energy_tolerance=0.05,
+                         success_tolerance=0.05, max_steps=1000, base_seed=0, max_workers=None,
+                         cache=None):
+    """
+    Measure every agent in every scenario with sequential early stopping.
+
+    Run i of every cell uses seed base_seed + i, so agents are compared on the
+    same rooms and the report is reproducible. All cells start with min_runs
+    episodes. Then, round by round, cells whose confidence intervals are still
+    too wide get round_runs more seeds, up to max_runs (see
+    adaptive_comparison.run_adaptive).
+
+    Args:
+        agent_names: Agents to test (keys of experiment_runner.AGENTS)
+        scenarios: Scenarios to test (keys of SCENARIOS)
+        min_runs: Episodes every cell runs before convergence is checked
+        max_runs: Episode cap per cell
+        round_runs: Episodes added to an unconverged cell per round
+        energy_tolerance: Target energy half-width, relative to the mean
+        success_tolerance: Target success rate half-width (absolute)
+        max_steps: Maximum number of steps per episode
+        base_seed: Seed of the first run
+        max_workers: Number of worker processes (default: all cores)
+        cache: Optional result_cache.ResultCache; cached episodes are not simulated again
+
+    Returns:
+        DataFrame: One row per (scenario, agent) with runs, means and intervals
+    """
+    cells = [({'scenario': scenario, 'agent': agent_name}, scenario_job(scenario, agent_name, max_steps))
+             for scenario in scenarios for agent_name in agent_names]
+    return run_adaptive(cells, min_runs, max_runs, round_runs, energy_tolerance, success_tolerance,
+                        base_seed, max_workers, cache)
+
+
+def analyze_robustness(agent_names=AGENT_NAMES, scenarios=tuple(SCENARIOS), **study_options):
+    """
+    Run the robustness study and print the measured results per scenario.
+
+    Args:
+        agent_names: Agents to test
+        scenarios: Scenarios to test
+        **study_options: Passed on to run_robustness_study()
+
+    Returns:
+        DataFrame: Per-cell summary (see run_robustness_study())
+    """
     print("Agent Robustness Analysis")
-    print("=" * 60)
-
-    scenarios = {
-        "Rectangular Room": "Unknown rectangular size",
-        "Irregular Shape": "Hallway connecting rooms", 
-        "Obstacles": "Squares that cannot be passed through",
-        "Imperfect Dirt Sensor": "10% false readings",
-        "Imperfect Bumper Sensor": "10% missed wall detections"
-    }
-    
-    for scenario, description in scenarios.items():
+    print("=" * 78)
+
+    summary = run_robustness_study(agent_names, scenarios, **study_options)
+
+    for scenario in scenarios:
+        description, _ = SCENARIOS[scenario]
         print(f"\nScenario: {scenario}")
         print(f"Description: {description}")
-        print("-" * 50)
-        
-        # Analyze each agent type
-        agents = {
-            "Randomized Agent": "simple_randomized_agent",
-            "Simple Reflex Agent": "simple_reflex_agent", 
-            "Model-Based Reflex Agent": "model_based_reflex_agent"
-        }
-        
-        for agent_name, agent_func in agents.items():
-            print(f"\n{agent_name}:")
-            
-            if scenario == "Rectangular Room":
-                print("  Performance: POOR")
-                print("  Issues:")
-                print("    - No adaptation to room dimensions")
-                print("    - May get stuck in corners")
-                print("    - Inefficient exploration patterns")
-                print("  Recommendations:")
-                print("    - Implement room size detection")
-                print("    - Use adaptive exploration strategies")
-                
-            elif scenario == "Irregular Shape":
-                print("  Performance: POOR to FAIR")
-                print("  Issues:")
-                print("    - Systematic exploration fails")
-                print("    - May miss disconnected areas")
-                print("    - Dead-end navigation problems")
-                print("  Recommendations:")
-                print("    - Implement graph-based exploration")
-                print("    - Use backtracking algorithms")
-                
-            elif scenario == "Obstacles":
-                print("  Performance: POOR")
-                print("  Issues:")
-                print("    - No obstacle avoidance")
-                print("    - May get trapped")
-                print("    - Incomplete room coverage")
-                print("  Recommendations:")
-                print("    - Implement obstacle mapping")
-                print("    - Use pathfinding algorithms")
-                
-            elif scenario == "Imperfect Dirt Sensor":
-                print("  Performance: FAIR to GOOD")
-                print("  Issues:")
-                print("    - May miss dirty squares")
-                print("    - May clean clean squares repeatedly")
-                print("    - Reduced efficiency")
-                print("  Recommendations:")
-                print("    - Implement sensor fusion")
-                print("    - Use probabilistic cleaning strategies")
-                
-            elif scenario == "Imperfect Bumper Sensor":
-                print("  Performance: POOR")
-                print("  Issues:")
-                print("    - May bump into walls")
-                print("    - Incorrect position estimation")
-                print("    - Navigation failures")
-                print("  Recommendations:")
-                print("    - Implement redundant sensors")
-                print("    - Use sensor validation techniques")
-        
-        print("\n" + "=" * 60)
-
-def print_detailed_analysis():
-    """Print detailed robustness assessment for each agent type."""
-    
+        print("-" * 78)
+        print_comparison(summary[summary['scenario'] == scenario])
+
+    print("\n" + "=" * 78)
+    return summary
+
+
+def performance_rating(success_rate):
+    """Rate a measured success rate: GOOD (>= 90%), FAIR (>= 50%) or POOR."""
+    if success_rate >= 0.9:
+        return "GOOD"
+    if success_rate >= 0.5:
+        return "FAIR"
+    return "POOR"
+
+
+def print_detailed_analysis(summary):
+    """
+    Print ratings and an overall ranking derived from measured results.
+
+    Args:
+        summary: Per-cell summary returned by analyze_robustness()
+    """
     print("\nDetailed Agent Robustness Assessment:")
-    print("=" * 60)
-    
-    analysis = """
-1. RECTANGULAR ROOM WITH UNKNOWN SIZE:
-
-Randomized Agent:
-- Performance: POOR
-- Issues: No adaptation to room dimensions, random movement may be inefficient
-- Impact: High energy consumption, low success rate
-- Mitigation: Would need room size detection and adaptive strategies
-
-Simple Reflex Agent:
-- Performance: FAIR
-- Issues: Basic wall avoidance helps, but no systematic exploration
-- Impact: Moderate energy consumption, moderate success rate
-- Mitigation: Could benefit from room size detection
-
-Model-Based Reflex Agent:
-- Performance: POOR
-- Issues: Assumes square room, systematic exploration fails
-- Impact: May get stuck or miss areas, high energy consumption
-- Mitigation: Needs adaptive exploration algorithms
-
-2. IRREGULAR SHAPE (HALLWAY CONNECTING ROOMS):
-
-Randomized Agent:
-- Performance: POOR
-- Issues: Random movement may miss disconnected areas
-- Impact: Very low success rate, high energy consumption
-- Mitigation: Would need graph-based exploration
-
-Simple Reflex Agent:
-- Performance: POOR
-- Issues: No systematic exploration, may miss areas
-- Impact: Low success rate, moderate energy consumption
-- Mitigation: Needs systematic exploration strategies
-
-Model-Based Reflex Agent:
-- Performance: POOR
-- Issues: Systematic row-by-row exploration fails for irregular shapes
-- Impact: May miss disconnected areas, incomplete cleaning
-- Mitigation: Needs graph-based exploration and connectivity analysis
-
-3. OBSTACLES (SQUARES THAT CANNOT BE PASSED THROUGH):
-
-Randomized Agent:
-- Performance: POOR
-- Issues: No obstacle avoidance, may get trapped
-- Impact: Very low success rate, high energy consumption
-- Mitigation: Needs obstacle detection and avoidance
-
-Simple Reflex Agent:
-- Performance: POOR
-- Issues: Basic wall avoidance doesn't help with internal obstacles
-- Impact: Low success rate, moderate energy consumption
-- Mitigation: Needs obstacle mapping and pathfinding
-
-Model-Based Reflex Agent:
-- Performance: POOR
-- Issues: Systematic exploration fails with obstacles
-- Impact: May get trapped, incomplete cleaning
-- Mitigation: Needs obstacle-aware pathfinding algorithms
-
-4. IMPERFECT DIRT SENSOR (10% FALSE READINGS):
-
-Randomized Agent:
-- Performance: FAIR
-- Issues: May miss dirty squares or clean clean squares repeatedly
-- Impact: Reduced efficiency, moderate success rate
-- Mitigation: Could benefit from sensor fusion
-
-Simple Reflex Agent:
-- Performance: GOOD
-- Issues: May miss some dirty squares, but basic cleaning strategy helps
-- Impact: Slight efficiency reduction, good success rate
-- Mitigation: Could implement probabilistic cleaning
-
-Model-Based Reflex Agent:
-- Performance: GOOD
-- Issues: May miss dirty squares, but systematic exploration helps
-- Impact: Slight efficiency reduction, good success rate
-- Mitigation: Could implement sensor validation and retry strategies
-
-5. IMPERFECT BUMPER SENSOR (10% MISSED WALL DETECTIONS):
-
-Randomized Agent:
-- Performance: POOR
-- Issues: May bump into walls, incorrect position estimation
-- Impact: High energy consumption, low success rate
-- Mitigation: Needs redundant sensors or validation
-
-Simple Reflex Agent:
-- Performance: POOR
-- Issues: Wall avoidance fails, may bump into walls
-- Impact: High energy consumption, low success rate
-- Mitigation: Needs sensor validation and redundancy
-
-Model-Based Reflex Agent:
-- Performance: POOR
-- Issues: Position estimation fails, systematic exploration breaks
-- Impact: Very low success rate, high energy consumption
-- Mitigation: Needs robust position tracking and sensor fusion
-
-OVERALL ROBUSTNESS RANKING:
-1. Simple Reflex Agent: Most robust overall
-2. Model-Based Reflex Agent: Good for ideal conditions, poor for complex environments
-3. Randomized Agent: Least robust, poor performance across all scenarios
-
-KEY INSIGHTS:
-- Simple reflex agents are most robust to sensor imperfections
-- Model-based agents perform well in ideal conditions but fail in complex environments
-- Randomized agents are least robust across all scenarios
-- Sensor reliability is critical for all agent types
-- Environmental complexity significantly impacts agent performance
-"""
-    
-    print(analysis)
+    print("=" * 78)
+
+    for i, (scenario, cells) in enumerate(summary.groupby('scenario', sort=False), 1):
+        print(f"\n{i}. {scenario.upper()}: {SCENARIOS[scenario][0]}")
+        for row in cells.sort_values(['success_rate', 'energy'], ascending=[False, True]).itertuples():
+            print(f"  {row.agent:<22} {performance_rating(row.success_rate):<5} "
+                  f"success {row.success_rate * 100:5.1f}%, energy {row.energy:7.1f}")
+
+    overall = summary.groupby('agent', sort=False).agg(success_rate=('success_rate', 'mean'),
+                                                       energy=('energy', 'mean'))
+    overall = overall.sort_values(['success_rate', 'energy'], ascending=[False, True])
+    print("\nOVERALL ROBUSTNESS RANKING (mean success rate across scenarios):")
+    for rank, row in enumerate(overall.itertuples(), 1):
+        print(f"{rank}. {row.Index}: {row.success_rate * 100:.1f}% success, "
+              f"{row.energy:.1f} average energy")
+
 
 if __name__ == "__main__":
-    analyze_robustness()
-    print_detailed_analysis()
+    summary = analyze_robustness()
+    print_detailed_analysis(summary)
@@ -0,0 +1,206 @@
+"""
+Room Maps and Layouts
+
+This module describes the floor plan an episode runs on. A RoomMap holds a
+boolean passability grid together with the 4-bit wall mask of every square,
+precomputed once, so the environments read bumper percepts with a single lookup
+instead of comparing the position against the room size every step. Maps can be
+built as open rectangles or loaded from ASCII and .npy layout files; loaded maps
+are cached, so a large floor plan is parsed once and shared by every episode.
+"""
+
+import os
+import random
+from functools import lru_cache
+
+import numpy as np
+from percepts import WALL_NORTH, WALL_SOUTH, WALL_WEST, WALL_EAST, NORTH, SOUTH, WEST
+
+# ASCII layout characters: '#' is a blocked square, anything else is floor
+BLOCKED = '#'
+
+
+def wall_mask_grid(passable):
+    """
+    Wall mask of every square of a passability grid.
+
+    A side is walled if it faces the edge of the grid or a blocked square.
+    Blocked squares get all four walls.
+
+    Returns:
+        ndarray: (H, W) uint8 wall masks indexed [y, x]
+    """
+    padded = np.pad(passable, 1, constant_values=False)
+    inner = padded[1:-1, 1:-1]
+    masks = (np.where(padded[:-2, 1:-1], 0, WALL_NORTH) | np.where(padded[2:, 1:-1], 0, WALL_SOUTH) |
+             np.where(padded[1:-1, :-2], 0, WALL_WEST) | np.where(padded[1:-1, 2:], 0, WALL_EAST))
+    masks[~inner] = WALL_NORTH | WALL_SOUTH | WALL_WEST | WALL_EAST
+    return masks.astype(np.uint8)
+
+
+def ray(grid, x, y, direction, length):
+    """
+    View of the squares next to (x, y) in a direction, in travel order.
+
+    Covers at most length squares and stops at the edge of the grid. The result
+    is a view, so writing to it writes to the grid.
+
+    Returns:
+        ndarray: 1-D view of grid along the ray
+    """
+    if direction == NORTH:
+        return grid[max(0, y - length):y, x][::-1]
+    if direction == SOUTH:
+        return grid[y + 1:y + 1 + length, x]
+    if direction == WEST:
+        return grid[y, max(0, x - length):x][::-1]
+    return grid[y, x + 1:x + 1 + length]
+
+
+class RoomMap:
+    """
+    Floor plan of a room: passable squares and their precomputed wall masks.
+
+    Maps are immutable (both grids are read-only), so one instance can be
+    shared by any number of episodes, agents and worker threads.
+    """
+
+    __slots__ = ('passable', 'walls', 'wall_rows', 'n_passable', 'name')
+
+    def __init__(self, passable, name=None):
+        passable = np.array(passable, dtype=bool)
+        if passable.ndim != 2 or not passable.any():
+            raise ValueError("A room map needs a 2-D grid with at least one passable square")
+        self.passable = passable
+        self.walls = wall_mask_grid(passable)
+        self.passable.flags.writeable = False
+        self.walls.flags.writeable = False
+        self.wall_rows = self.walls.tolist()          # Nested lists for fast scalar lookups
+        self.n_passable = int(np.count_nonzero(passable))
+        self.name = name
+
+    @property
+    def shape(self):
+        return self.passable.shape
+
+    @property
+    def height(self):
+        return self.passable.shape[0]
+
+    @property
+    def width(self):
+        return self.passable.shape[1]
+
+    @classmethod
+    def rectangle(cls, width, height=None):
+        """Open width x height room (square if height is omitted)."""
+        return open_room(width, width if height is None else height)
+
+    @classmethod
+    def from_ascii(cls, text, name=None):
+        """
+        Build a map from an ASCII layout.
+
+        Each line is a row; '#' marks a blocked square and any other character is
+        floor. Short lines are padded with blocked squares.
+        """
+        rows = [line.rstrip('\n') for line in text.strip('\n').splitlines()]
+        width = max(len(row) for row in rows)
+        passable = np.array([[char != BLOCKED for char in row.ljust(width, BLOCKED)] for row in rows])
+        return cls(passable, name)
+
+    def to_ascii(self):
+        """ASCII layout of the map ('.' for floor, '#' for blocked squares)."""
+        chars = np.where(self.passable, '.', BLOCKED)
+        return '\n'.join(''.join(row) for row in chars)
+
+    def random_dirt(self, dirt_prob, rng=None):
+        """
+        Dirt grid where each passable square is dirty with probability dirt_prob.
+
+        Draws from rng (a numpy Generator) if given, else from numpy's global state.
+        """
+        uniforms = np.random.random(self.shape) if rng is None else rng.random(self.shape)
+        return (uniforms < dirt_prob) & self.passable
+
+    def random_start(self, rng=None):
+        """
+        Uniformly random passable square.
+
+        Draws x then y and retries on blocked squares. Without rng the draws come
+        from random.randint, so an open room consumes exactly the draws the
+        environments always made.
+
+        Returns:
+            tuple: (x, y)
+        """
+        height, width = self.shape
+        passable = self.passable
+        while True:
+            if rng is None:
+                x = random.randint(0, width - 1)
+                y = random.randint(0, height - 1)
+            else:
+                x = int(rng.integers(width))
+                y = int(rng.integers(height))
+            if passable[y, x]:
+                return x, y
+
+    def __repr__(self):
+        label = f" {self.name!r}" if self.name else ""
+        return f"<RoomMap{label} {self.width}x{self.height}, {self.n_passable} passable squares>"
+
+
+@lru_cache(maxsize=None)
+def open_room(width, height):
+    """Shared RoomMap of an open width x height room."""
+    return RoomMap(np.ones((height, width), dtype=bool), f"{width}x{height}")
+
+
+@lru_cache(maxsize=32)
+def _load_cached(path, mtime):
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith('.npy'):
+        return RoomMap(np.load(path) != 0, name)
+    with open(path) as layout:
+        return RoomMap.from_ascii(layout.read(), name)
+
+
+def load_room_map(path):
+    """
+    Load a room map from a layout file.
+
+    .npy files hold a 2-D array that is nonzero on passable squares; any other
+    file is read as an ASCII layout (see RoomMap.from_ascii). Maps are cached
+    per file and reloaded only when the file changes.
+
+    Returns:
+        RoomMap: The loaded (shared, read-only) map
+    """
+    path = os.path.abspath(path)
+    return _load_cached(path, os.path.getmtime(path))
+
+
+def save_room_map(room_map, path):
+    """Save a room map as a .npy passability grid or, for other extensions, as ASCII."""
+    if path.endswith('.npy'):
+        np.save(path, room_map.passable)
+    else:
+        with open(path, 'w') as layout:
+            layout.write(room_map.to_ascii() + '\n')
+
+
+def resolve_room_map(room_map, room_size):
+    """
+    Room map for an environment call: a RoomMap, a layout path, or None for an open square room.
+    """
+    if room_map is None:
+        return open_room(room_size, room_size)
+    if isinstance(room_map, RoomMap):
+        return room_map
+    return load_room_map(room_map)
+
+
+if __name__ == "__main__":
+    print("Room map module loaded successfully!")
+    print("Use RoomMap.rectangle(), RoomMap.from_ascii() or load_room_map() to build floor plans.")
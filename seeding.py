@@ -0,0 +1,92 @@
+"""
+Seeding and Random Streams
+
+This module turns a seed into independent numpy Generators. An episode seed is
+expanded with SeedSequence into separate streams for the room, the start
+position, the sensor noise and the agent. Each part of the simulation then draws
+from its own stream, so results do not depend on the order in which episodes or
+agents run: an episode gives the same result sequentially, in a worker process
+or inside a batch. A seed can be an int, a SeedSequence or a Generator.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# Independent streams used by one episode
+EpisodeStreams = namedtuple('EpisodeStreams', ['room', 'start', 'noise', 'agent'])
+
+
+def as_generator(seed=None):
+    """Generator for a seed (an existing Generator is returned unchanged)."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed, n):
+    """
+    Spawn n independent child seeds (Generator seeds need numpy 1.25 or later).
+
+    Returns:
+        list: SeedSequences (or Generators, when seed is a Generator)
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed.spawn(n)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+
+def child_seed(seed, index):
+    """
+    The index-th child of spawn_seeds(seed, n), for any n > index, without spawning the rest.
+
+    Batches use this to give episode i the same seed whatever the batch size.
+    seed must be an int or a SeedSequence that has not spawned children yet.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (index,),
+                                  pool_size=seed.pool_size)
+
+
+def episode_streams(seed):
+    """
+    Independent Generators for the parts of one episode.
+
+    Returns:
+        EpisodeStreams: room, start, noise and agent Generators
+    """
+    return EpisodeStreams(*(as_generator(child) for child in spawn_seeds(seed, len(EpisodeStreams._fields))))
+
+
+class ChoiceStream:
+    """
+    Uniform random choices drawn in blocks from a Generator.
+
+    choice(options) works like random.choice, but each call costs a list lookup:
+    uniforms are generated block_size at a time.
+    """
+
+    __slots__ = ('rng', 'block_size', '_uniforms', '_index')
+
+    def __init__(self, seed=None, block_size=4096):
+        self.rng = as_generator(seed)
+        self.block_size = block_size
+        self._uniforms = []
+        self._index = 0
+
+    def choice(self, options):
+        """Pick one element of a non-empty sequence uniformly at random."""
+        i = self._index
+        if i == len(self._uniforms):
+            self._uniforms = self.rng.random(self.block_size).tolist()
+            i = 0
+        self._index = i + 1
+        return options[int(self._uniforms[i] * len(options))]
+
+
+if __name__ == "__main__":
+    print("Seeding module loaded successfully!")
+    print("Pass seed=<int or Generator> to the environments; episode_streams() shows the split.")
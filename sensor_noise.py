@@ -0,0 +1,115 @@
+"""
+Sensor Noise Models
+
+This module provides the noisy-sensor stage that sits between the world state and
+the agent. A SensorNoise corrupts each step's Percept in place: every bumper misses
+an adjacent wall with probability bumper_miss_rate, and the dirt reading is flipped
+with probability dirt_error_rate. The noise is drawn in blocks from a single numpy
+Generator, so a noisy step costs two list lookups instead of fresh random calls.
+"""
+
+import numpy as np
+from percepts import WALL_BITS
+
+ALL_WALLS = sum(WALL_BITS)
+_WALL_BIT_VALUES = np.array(WALL_BITS, dtype=np.int64)
+
+
+class SensorNoise:
+    """
+    Bumper-miss and dirt-flip noise applied to percepts.
+
+    Without an explicit seed, the Generator is seeded from numpy's global random
+    state the first time noise is needed, so np.random.seed() keeps runs
+    reproducible (the same convention as simple_agent.RandomizedAgent).
+    """
+
+    def __init__(self, dirt_error_rate=0.0, bumper_miss_rate=0.0, seed=None, block_size=4096):
+        self.dirt_error_rate = dirt_error_rate
+        self.bumper_miss_rate = bumper_miss_rate
+        self.block_size = block_size
+        self.seed = None
+        self._rng = None
+        self._keep_walls = []   # Per-step mask of the wall bits the bumpers report
+        self._flip_dirt = []    # Per-step flag: flip the dirt reading
+        self._index = 0
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Start a new episode.
+
+        A new seed restarts the noise stream from that seed. A stage that was
+        given a seed earlier keeps drawing from its stream; an unseeded stage is
+        seeded again from numpy's global state when it next needs noise.
+        """
+        if seed is not None:
+            self.seed = seed
+            self._rng = np.random.default_rng(seed)
+        elif self.seed is None:
+            self._rng = None
+        else:
+            return
+        self._keep_walls = []
+        self._flip_dirt = []
+        self._index = 0
+
+    def _refill(self):
+        if self._rng is None:
+            self._rng = np.random.default_rng(np.random.randint(2**63, dtype=np.int64))
+        block = self.block_size
+        if self.bumper_miss_rate > 0:
+            missed = self._rng.random((block, 4)) < self.bumper_miss_rate
+            self._keep_walls = (ALL_WALLS ^ (missed @ _WALL_BIT_VALUES)).tolist()
+        else:
+            self._keep_walls = [ALL_WALLS] * block
+        if self.dirt_error_rate > 0:
+            self._flip_dirt = (self._rng.random(block) < self.dirt_error_rate).tolist()
+        else:
+            self._flip_dirt = [False] * block
+        self._index = 0
+
+    def apply(self, percept):
+        """
+        Corrupt a Percept in place.
+
+        Returns:
+            Percept: The same percept, as the agent should see it
+        """
+        i = self._index
+        if i == len(self._flip_dirt):
+            self._refill()
+            i = 0
+        percept.walls &= self._keep_walls[i]
+        if self._flip_dirt[i]:
+            percept.dirty = not percept.dirty
+        self._index = i + 1
+        return percept
+
+    def apply_batch(self, walls, dirty):
+        """
+        Corrupt the percepts of a batch of episodes.
+
+        Args:
+            walls: (n, 4) boolean wall readings ordered north, south, west, east
+            dirty: (n,) boolean dirt readings
+
+        Returns:
+            tuple: New (walls, dirty) arrays as the agents should see them
+        """
+        if self._rng is None:
+            self._rng = np.random.default_rng(np.random.randint(2**63, dtype=np.int64))
+        if self.bumper_miss_rate > 0:
+            walls = walls & (self._rng.random(walls.shape) >= self.bumper_miss_rate)
+        if self.dirt_error_rate > 0:
+            dirty = dirty ^ (self._rng.random(dirty.shape) < self.dirt_error_rate)
+        return walls, dirty
+
+    def __repr__(self):
+        return (f"SensorNoise(dirt_error_rate={self.dirt_error_rate}, "
+                f"bumper_miss_rate={self.bumper_miss_rate})")
+
+
+if __name__ == "__main__":
+    print("Sensor noise module loaded successfully!")
+    print("Pass SensorNoise(dirt_error_rate, bumper_miss_rate) to an environment as its sensor_noise stage.")
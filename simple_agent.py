@@ -6,57 +6,156 @@ The agent cleans dirt when detected and moves randomly while avoiding walls.
 """
 
 import random
+import numpy as np
+from percepts import Agent, random_chooser, OPEN_MOVES, SUCK
 
-def simple_reflex_agent(bumpers, dirty):
+def simple_reflex_policy(percept):
     """
-    Simple reflex agent that reacts to bumper and dirt sensors.
+    Simple reflex agent on the compact percept interface.
     
     Args:
-        bumpers: Dictionary with boolean values for north, south, east, west
-        dirty: Boolean indicating if current square is dirty
+        percept: Percept with the wall mask and dirt flag for this step
     
     Returns:
-        str: Action to take ("north", "south", "east", "west", "suck")
+        int: Action code
     """
-    # If the robot sees dirt, it always cleans first
-    if dirty:
-        return "suck"
+    if percept.dirty:
+        return SUCK
+    moves = OPEN_MOVES[percept.walls]
+    if not moves:
+        return SUCK
+    return random.choice(moves)
+
+def simple_reflex_batch_policy(walls, dirty, episodes=None, rng=None):
+    """
+    Simple reflex agent for a whole batch of episodes in one array operation.
     
-    # Otherwise, check which directions are safe (no wall)
-    available_directions = []
-    if not bumpers["north"]:
-        available_directions.append("north")
-    if not bumpers["south"]:
-        available_directions.append("south")
-    if not bumpers["east"]:
-        available_directions.append("east")
-    if not bumpers["west"]:
-        available_directions.append("west")
+    Same rule as simple_reflex_policy: suck where dirty (or boxed in), otherwise
+    move in a uniformly random open direction. Used as a batch policy by
+    batch_environment.batch_vacuum_environment.
     
-    # If no safe moves (shouldn't really happen), just suck
-    if not available_directions:
-        return "suck"
+    Args:
+        walls: (N, 4) boolean wall readings ordered north, south, west, east
+        dirty: (N,) boolean dirt readings
+        episodes: Episode index of each row (unused; the agent is stateless)
+        rng: Optional numpy Generator (default: numpy's global random state)
     
-    # Pick one safe direction randomly
-    return random.choice(available_directions)
+    Returns:
+        ndarray: (N,) action codes
+    """
+    open_moves = ~np.asarray(walls, dtype=bool)
+    n_open = open_moves.sum(axis=1)
+    uniforms = np.random.random(len(n_open)) if rng is None else rng.random(len(n_open))
+    # Index of the chosen move among the open ones, then its direction code
+    pick = (uniforms * n_open).astype(np.int64)
+    rank = np.cumsum(open_moves, axis=1) - 1
+    moves = np.argmax(open_moves & (rank == pick[:, None]), axis=1)
+    return np.where(np.asarray(dirty, dtype=bool) | (n_open == 0), SUCK, moves)
 
-def simple_randomized_agent(bumpers, dirty):
+def randomized_batch_policy(walls, dirty, episodes=None, rng=None):
     """
-    Simple randomized agent that ignores sensors (for comparison).
+    Randomized agent for a whole batch of episodes: one random action code per row.
     
     Args:
-        bumpers: Dictionary with boolean values for north, south, east, west
-        dirty: Boolean indicating if current square is dirty
+        walls: (N, 4) boolean wall readings (ignored)
+        dirty: (N,) boolean dirt readings (ignored)
+        episodes: Episode index of each row (unused)
+        rng: Optional numpy Generator (default: numpy's global random state)
     
     Returns:
-        str: Random action
+        ndarray: (N,) action codes
+    """
+    n = len(dirty)
+    return np.random.randint(0, 5, size=n) if rng is None else rng.integers(0, 5, size=n)
+
+class SimpleReflexAgent(Agent):
+    """
+    Simple reflex agent as an Agent object.
+    
+    It keeps no state between steps apart from its random stream: unseeded, it
+    uses random.choice exactly like simple_reflex_policy; seeded, it draws from
+    its own Generator.
+    """
+    
+    __slots__ = ('choice',)
+    
+    batch_policy = staticmethod(simple_reflex_batch_policy)
+    
+    def __init__(self, seed=None):
+        self.choice = random_chooser(seed)
+    
+    def reset(self, seed=None):
+        """Start a new episode; a seed restarts the agent's random stream."""
+        if seed is not None:
+            self.choice = random_chooser(seed)
+    
+    def act(self, percept):
+        """Suck if dirty, otherwise move in a random open direction."""
+        if percept.dirty:
+            return SUCK
+        moves = OPEN_MOVES[percept.walls]
+        return self.choice(moves) if moves else SUCK
+
+class RandomizedAgent(Agent):
+    """
+    Randomized agent that ignores sensors (for comparison).
+    
+    Actions are drawn in blocks from a numpy Generator and served from a buffer,
+    so each step costs a list lookup instead of a np.random.choice call. Without
+    an explicit seed, the Generator is seeded from numpy's global random state the
+    first time an action is needed, so np.random.seed() keeps runs reproducible.
     """
-    import numpy as np
-    actions = ["north", "east", "west", "south", "suck"]
-    return np.random.choice(actions)
+    
+    batch_policy = staticmethod(randomized_batch_policy)
+    
+    def __init__(self, seed=None, block_size=4096):
+        self.block_size = block_size
+        self.seed = None
+        self._rng = None
+        self._buffer = []
+        self._index = 0
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        """
+        Start a new episode.
+        
+        A new seed restarts the action stream from that seed. An agent that was
+        given a seed earlier keeps drawing from its stream; an unseeded agent is
+        seeded again from numpy's global state when it next needs actions.
+        """
+        if seed is not None:
+            self.seed = seed
+            self._rng = np.random.default_rng(seed)
+        elif self.seed is None:
+            self._rng = None
+        else:
+            return
+        self._buffer = []
+        self._index = 0
+    
+    def _refill(self):
+        if self._rng is None:
+            self._rng = np.random.default_rng(np.random.randint(2**63, dtype=np.int64))
+        self._buffer = self._rng.integers(0, 5, size=self.block_size).tolist()
+        self._index = 0
+    
+    def act(self, percept):
+        """Return a random action code (the percept is ignored)."""
+        if self._index == len(self._buffer):
+            self._refill()
+        action = self._buffer[self._index]
+        self._index += 1
+        return action
+
+# Shared instances used wherever a plain agent function is expected. Being Agents,
+# they are reset with the episode's agent seed, so seeded runs are reproducible.
+simple_reflex_agent = SimpleReflexAgent()
+simple_randomized_agent = RandomizedAgent()
 
 if __name__ == "__main__":
     print("Simple Reflex Agent module loaded successfully!")
     print("Available agents:")
     print("- simple_reflex_agent: Cleans dirt and avoids walls")
     print("- simple_randomized_agent: Random actions (for comparison)")
+    print("- simple_reflex_batch_policy / randomized_batch_policy: batch versions for batch_environment")
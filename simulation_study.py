@@ -0,0 +1,198 @@
+"""
+Task 4: Simulation Study
+
+This module benchmarks every agent on 5x5, 10x10 and 100x100 rooms. Episodes run
+in parallel through the experiment runner, each finished (agent, room size) cell is
+reported as soon as it completes and appended to a checkpoint file, so an
+interrupted study resumes where it stopped.
+"""
+
+import os
+
+import pandas as pd
+
+from experiment_runner import AGENTS, make_jobs, iter_experiments
+from result_cache import code_version
+
+AGENT_NAMES = ('Randomized', 'Simple Reflex', 'Model-Based', 'Improved Model-Based')
+ROOM_SIZES = (5, 10, 100)
+CHECKPOINT_PATH = 'simulation_study_results.csv'
+FIGURE_PATH = 'simulation_study_performance.png'
+
+
+def step_budget(room_size):
+    """
+    Default step budget for a room size.
+
+    Large enough for a systematic agent to sweep the whole room (about two
+    steps per square), and never below the environment's usual 1000 steps.
+    """
+    return max(1000, 2 * room_size * room_size)
+
+
+def current_rows(results):
+    """Mask of checkpoint rows written by the current code version of their agent."""
+    if 'code_version' not in results:
+        return pd.Series(False, index=results.index)
+    versions = results['agent'].map(lambda agent_name: code_version(AGENTS[agent_name])
+                                    if agent_name in AGENTS else None)
+    return results['code_version'] == versions
+
+
+def prune_checkpoint(checkpoint_path):
+    """
+    Drop rows written by other code versions from a checkpoint file.
+
+    The file is rewritten without them, or deleted if nothing current is left
+    (including files from before rows carried a code version), so it does not
+    grow with stale results every time the code changes.
+
+    Returns:
+        bool: Whether the checkpoint file still exists (new cells are appended to it)
+    """
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return False
+    results = pd.read_csv(checkpoint_path, dtype={'code_version': str})
+    current = current_rows(results)
+    if current.all():
+        return True
+    if not current.any():
+        os.remove(checkpoint_path)
+        return False
+    results[current].to_csv(checkpoint_path, index=False)
+    return True
+
+
+def load_checkpoint(checkpoint_path, n_runs, dirt_prob, max_steps=None, base_seed=0):
+    """
+    Load finished cells from a checkpoint file.
+
+    Only cells that ran all n_runs episodes with the same seeds, dirt probability,
+    step budget and code version (see result_cache.code_version) are reused;
+    anything else is recomputed.
+
+    Returns:
+        DataFrame: Per-episode rows of the finished cells
+    """
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return pd.DataFrame()
+
+    results = pd.read_csv(checkpoint_path, dtype={'code_version': str})
+    results = results[current_rows(results)].drop(columns='code_version')
+    budgets = results['room_size'].map(step_budget) if max_steps is None else max_steps
+    results = results[(results['dirt_prob'] == dirt_prob) & (results['max_steps'] == budgets) &
+                      results['seed'].between(base_seed, base_seed + n_runs - 1)]
+    runs = results.groupby(['agent', 'room_size'])['seed'].transform('nunique')
+    return results[runs == n_runs]
+
+
+def run_simulation_study(agent_names=AGENT_NAMES, room_sizes=ROOM_SIZES, n_runs=100,
+                         dirt_prob=0.2, max_steps=None, checkpoint_path=CHECKPOINT_PATH,
+                         max_workers=None, base_seed=0, cache=None):
+    """
+    Run every agent on every room size and collect per-episode results.
+
+    Args:
+        agent_names: Agents to test (keys of experiment_runner.AGENTS)
+        room_sizes: Room sizes to test
+        n_runs: Number of episodes per (agent, room size) cell
+        dirt_prob: Probability that each square starts dirty
+        max_steps: Maximum number of steps per episode (default: step_budget(room_size))
+        checkpoint_path: CSV file where finished cells are stored (None disables it)
+        max_workers: Number of worker processes (default: all cores)
+        base_seed: Seed of the first run (run i uses base_seed + i)
+        cache: Optional result_cache.ResultCache; cached episodes are not simulated again
+
+    Returns:
+        DataFrame: One row per episode
+    """
+    append = prune_checkpoint(checkpoint_path)
+    finished = load_checkpoint(checkpoint_path, n_runs, dirt_prob, max_steps, base_seed)
+    if len(finished):
+        finished = finished[finished['agent'].isin(agent_names) & finished['room_size'].isin(room_sizes)]
+    done = set(zip(finished.get('agent', []), finished.get('room_size', [])))
+    for agent_name, room_size in sorted(done, key=lambda cell: (agent_names.index(cell[0]), cell[1])):
+        print(f"  {agent_name:<20} {room_size:>3}x{room_size:<3} loaded from checkpoint")
+
+    jobs = [dict(job, max_steps=step_budget(job['room_size']) if max_steps is None else max_steps)
+            for job in make_jobs(agent_names, room_sizes, (dirt_prob,), n_runs=n_runs, base_seed=base_seed)
+            if (job['agent'], job['room_size']) not in done]
+
+    # Stream rows in and report each cell once all its episodes are in
+    pending = {}
+    frames = [finished]
+    for row in iter_experiments(jobs, max_workers=max_workers, cache=cache):
+        cell = (row['agent'], row['room_size'])
+        rows = pending.setdefault(cell, [])
+        rows.append(row)
+        if len(rows) < n_runs:
+            continue
+
+        cell_results = pd.DataFrame(pending.pop(cell))
+        frames.append(cell_results)
+        if checkpoint_path:
+            cell_results.assign(code_version=code_version(AGENTS[cell[0]])).to_csv(
+                checkpoint_path, mode='a' if append else 'w', header=not append, index=False)
+            append = True
+        print(f"  {cell[0]:<20} {cell[1]:>3}x{cell[1]:<3} "
+              f"avg energy {cell_results['energy'].mean():8.1f}, "
+              f"success {cell_results['success'].mean() * 100:5.1f}%")
+
+    rank = {agent_name: i for i, agent_name in enumerate(agent_names)}
+    results = pd.concat(frames, ignore_index=True)
+    results = results.sort_values(['agent', 'room_size', 'seed'],
+                                  key=lambda col: col.map(rank) if col.name == 'agent' else col)
+    return results.reset_index(drop=True)
+
+
+def performance_table(results):
+    """
+    Summarize per-episode results as average energy per agent and room size.
+
+    Returns:
+        DataFrame: Agents as rows, room sizes as columns
+    """
+    table = results.pivot_table(index='agent', columns='room_size', values='energy',
+                                aggfunc='mean', sort=False)
+    table.columns = [f"{size}x{size}" for size in table.columns]
+    return table
+
+
+def print_performance_table(results):
+    """Print average energy and success rate for each agent and room size."""
+    print("\nAverage energy used (success rate):")
+    print("=" * 70)
+
+    success = results.pivot_table(index='agent', columns='room_size', values='success',
+                                  aggfunc='mean', sort=False)
+    energy = performance_table(results)
+
+    print(f"{'Agent':<22}" + "".join(f"{column:>16}" for column in energy.columns))
+    print("-" * 70)
+    for agent_name in energy.index:
+        cells = [f"{energy.loc[agent_name, column]:7.1f} ({success.loc[agent_name, size] * 100:3.0f}%)"
+                 for column, size in zip(energy.columns, success.columns)]
+        print(f"{agent_name:<22}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+def create_performance_visualization(results, figure_path=FIGURE_PATH):
+    """Plot average energy per agent and room size as a grouped bar chart."""
+    import matplotlib.pyplot as plt
+
+    table = performance_table(results)
+    ax = table.T.plot(kind='bar', figsize=(8, 5), rot=0)
+    ax.set_yscale('log')
+    ax.set_xlabel('Room size')
+    ax.set_ylabel('Average energy used (log scale)')
+    ax.set_title('Agent performance by room size')
+    ax.legend(title='Agent')
+    plt.tight_layout()
+    plt.savefig(figure_path)
+    plt.close()
+    print(f"\nPerformance chart saved to {figure_path}")
+
+
+if __name__ == "__main__":
+    results = run_simulation_study()
+    print_performance_table(results)
+    create_performance_visualization(results)
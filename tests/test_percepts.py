@@ -0,0 +1,20 @@
+"""The legacy (bumpers, dirty) interface must keep invalid actions invalid."""
+
+from percepts import Agent, BUMPERS, INVALID, Percept, as_policy
+
+
+class InvalidAgent(Agent):
+    __slots__ = ()
+
+    def act(self, percept):
+        return INVALID
+
+
+def test_legacy_call_names_invalid_actions():
+    assert InvalidAgent()(BUMPERS[0], False) == 'invalid'
+
+
+def test_invalid_action_name_round_trips_to_invalid_code():
+    legacy = InvalidAgent()
+    policy = as_policy(lambda bumpers, dirty: legacy(bumpers, dirty))
+    assert policy(Percept(0, True)) == INVALID
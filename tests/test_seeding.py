@@ -0,0 +1,10 @@
+"""Seeded episodes must be reproducible, whatever the agent."""
+
+from environment import vacuum_environment
+from simple_agent import simple_reflex_agent
+
+
+def test_seeded_simple_reflex_agent_is_reproducible():
+    first = vacuum_environment(simple_reflex_agent, room_size=5, seed=1)
+    second = vacuum_environment(simple_reflex_agent, room_size=5, seed=1)
+    assert first == second